@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+NERUPPU DAA - Monte Carlo balance analyzer
+Plays large numbers of headless games on every core and summarises
+survival, score and death causes per difficulty level
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from batch_sim import BatchedEngine
+from neruppu_daa import Colors, INPUT_LEFT, INPUT_RIGHT
+
+POLICIES = ('dodge', 'random', 'stay')
+DEATH_CAUSES = ('slow stone', 'mid stone', 'fast stone', 'survived')
+MAX_LEVEL = 16
+
+def time_factor(frames):
+    """Difficulty factor from spawn_fire_brimstone (0 -> 3 over 900 frames)"""
+    return np.minimum(np.asarray(frames) / 300.0, 3.0)
+
+def difficulty_level(frames):
+    """HUD difficulty level (1-16) for a frame count, as in draw_game"""
+    return (time_factor(frames) * 5).astype(np.int64) + 1
+
+def dodge_policy(engine):
+    """Step towards whichever of stay/left/right has the fewest stones close above"""
+    fire = engine.fire
+    near = fire.active & (fire.y >= engine.player_y - 5)
+    x = engine.player_x
+    danger = []
+    for move in (0, -2, 2):
+        target = x + move
+        blocked = (target < 0) | (target > engine.width - 1)
+        count = (near & (np.abs(fire.x - target[:, None]) <= 1)).sum(axis=1)
+        danger.append(np.where(blocked, 1 << 30, count))
+    choice = np.argmin(np.stack(danger), axis=0)  # ties prefer staying put
+    return np.choose(choice, [0, INPUT_LEFT, INPUT_RIGHT])
+
+def play_chunk(first_seed, games, policy, max_frames, width, height):
+    """Worker: play one block of seeded games, return compact summary arrays"""
+    engine = BatchedEngine(range(first_seed, first_seed + games), width=width, height=height)
+    if policy == 'dodge':
+        step_policy = dodge_policy
+    elif policy == 'random':
+        rng = np.random.default_rng(first_seed)
+        step_policy = lambda e: rng.integers(0, 4, size=e.live)
+    else:
+        step_policy = None
+    engine.run(step_policy, max_frames=max_frames)
+
+    # Killer speed relative to the speed range at the time of death
+    factor = time_factor(engine.frames)
+    low, high = 0.8 + factor * 0.2, 1.5 + factor * 0.5
+    third = np.clip(((engine.killer_speed - low) / (high - low) * 3).astype(np.int64), 0, 2)
+    cause = np.where(engine.game_over, third, DEATH_CAUSES.index('survived'))
+
+    return {
+        'frames': engine.frames.astype(np.int32),
+        'scores': engine.scores.astype(np.int32),
+        'cause': cause.astype(np.int8),
+        'power_ups': engine.power_ups_collected.astype(np.int16),
+    }
+
+def analyze(results):
+    """Group combined results by the difficulty level reached"""
+    frames = results['frames']
+    levels = difficulty_level(frames)
+    report = {'games': int(len(frames)), 'levels': []}
+    for level in range(1, MAX_LEVEL + 1):
+        here = levels == level
+        count = int(here.sum())
+        if not count:
+            continue
+        scores = results['scores'][here]
+        survival = frames[here] / 10.0
+        causes = np.bincount(results['cause'][here], minlength=len(DEATH_CAUSES))
+        report['levels'].append({
+            'level': level,
+            'games': count,
+            'share': count / len(frames),
+            'survival_mean_s': float(survival.mean()),
+            'survival_p90_s': float(np.percentile(survival, 90)),
+            'score_median': float(np.median(scores)),
+            'score_p90': float(np.percentile(scores, 90)),
+            'causes': {name: int(n) for name, n in zip(DEATH_CAUSES, causes)},
+        })
+    report['survival_mean_s'] = float(frames.mean() / 10.0)
+    report['score_median'] = float(np.median(results['scores']))
+    report['power_ups_mean'] = float(results['power_ups'].mean())
+    return report
+
+def difficulty_curve():
+    """Spawn chance and speed range at the start of every level
+
+    spawn_rate keeps growing past 1.0, but a chance above 100% just means
+    a stone every frame, so the effective value is reported.
+    """
+    rows = []
+    for level in range(1, MAX_LEVEL + 1):
+        frame = (level - 1) * 60
+        factor = float(time_factor(frame))
+        spawn_chance = min(0.70 + factor * 0.27, 1.0)
+        rows.append((level, frame, spawn_chance, 0.8 + factor * 0.2, 1.5 + factor * 0.5))
+    return rows
+
+def print_report(report, policy):
+    print(f"{Colors.BOLD}{Colors.YELLOW}🔥 NERUPPU DAA balance report ({report['games']:,} games, {policy} policy){Colors.RESET}")
+    print(f"Mean survival: {report['survival_mean_s']:.1f}s | Median score: {report['score_median']:,.0f} | "
+          f"Power-ups/game: {report['power_ups_mean']:.2f}")
+    print()
+    print(f"{Colors.CYAN}Level  From   Spawn  Speed range{Colors.RESET}")
+    for level, frame, spawn_rate, low, high in difficulty_curve():
+        print(f"{level:>5}  {frame / 10:>4.0f}s  {spawn_rate:>5.0%}  {low:.2f}-{high:.2f}")
+    print()
+    print(f"{Colors.CYAN}Level  Ended   Share  Survival(avg/p90)  Score(med/p90)   "
+          f"{'  '.join(f'{name:>10}' for name in DEATH_CAUSES)}{Colors.RESET}")
+    for row in report['levels']:
+        causes = '  '.join(f"{row['causes'][name] / row['games']:>10.1%}" for name in DEATH_CAUSES)
+        print(f"{row['level']:>5}  {row['games']:>6,}  {row['share']:>5.1%}  "
+              f"{row['survival_mean_s']:>7.1f}s/{row['survival_p90_s']:>6.1f}s  "
+              f"{row['score_median']:>7,.0f}/{row['score_p90']:>7,.0f}  {causes}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo balance analysis for NERUPPU DAA")
+    parser.add_argument('--games', type=int, default=100_000, help="total games to play")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--chunk', type=int, default=2_000, help="games per worker task")
+    parser.add_argument('--policy', choices=POLICIES, default='dodge', help="scripted player")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--max-frames', type=int, default=9_000, help="stop games after this many frames")
+    parser.add_argument('--width', type=int, default=60)
+    parser.add_argument('--height', type=int, default=20)
+    parser.add_argument('--json', metavar='PATH', help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    chunks = [(seed, min(args.chunk, args.seed + args.games - seed))
+              for seed in range(args.seed, args.seed + args.games, args.chunk)]
+    start = time.perf_counter()
+    parts = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(play_chunk, seed, games, args.policy, args.max_frames,
+                               args.width, args.height) for seed, games in chunks]
+        for future in futures:
+            parts.append(future.result())
+    elapsed = time.perf_counter() - start
+
+    results = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    report = analyze(results)
+    report['policy'] = args.policy
+    report['workers'] = args.workers
+    report['elapsed_s'] = elapsed
+    report['game_frames_per_s'] = float(results['frames'].sum() / elapsed)
+
+    print_report(report, args.policy)
+    print()
+    print(f"{Colors.GREEN}{args.workers} workers | {elapsed:.1f}s | "
+          f"{args.games / elapsed:,.0f} games/s | {report['game_frames_per_s']:,.0f} game-frames/s{Colors.RESET}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
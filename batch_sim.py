@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+NERUPPU DAA - Batched simulator
+Steps many independent games at once with NumPy, using the same rules
+as NeruppuDaaEngine.update_game
+"""
+
+import numpy as np
+from neruppu_daa import POWER_UP_TYPES, INPUT_LEFT, INPUT_RIGHT, SPAWN_BLOCK, SpawnSchedule
+
+DOUBLE_POINTS, EXTRA_LIFE, SLOW_MOTION, SHIELD = (
+    list(POWER_UP_TYPES.values()).index(kind)
+    for kind in ('double_points', 'extra_life', 'slow_motion', 'shield')
+)
+NO_SLOT = np.iinfo(np.int64).max
+
+class EntityBuffer:
+    """Padded per-game entity columns: row = game, column = slot
+
+    At most one entity of each kind spawns per frame, so the spawn frame
+    doubles as the list order the scalar engine keeps.
+    """
+    def __init__(self, games, capacity):
+        self.active = np.zeros((games, capacity), dtype=bool)
+        self.x = np.zeros((games, capacity), dtype=np.int64)
+        self.y = np.zeros((games, capacity), dtype=np.float64)
+        self.speed = np.zeros((games, capacity), dtype=np.float64)
+        self.glyph = np.zeros((games, capacity), dtype=np.uint8)
+        self.spawned = np.zeros((games, capacity), dtype=np.int64)
+
+    def columns(self):
+        return ('active', 'x', 'y', 'speed', 'glyph', 'spawned')
+
+    def spawn(self, games, xs, speeds, glyphs, frames):
+        """Put one new entity into the first free slot of each listed game"""
+        if not len(games):
+            return
+        occupied = self.active[games]
+        if occupied.all(axis=1).any():
+            self._grow()
+            occupied = self.active[games]
+        slots = np.argmin(occupied, axis=1)
+        self.active[games, slots] = True
+        self.x[games, slots] = xs
+        self.y[games, slots] = 0.0
+        self.speed[games, slots] = speeds
+        self.glyph[games, slots] = glyphs
+        self.spawned[games, slots] = frames
+
+    def _grow(self):
+        """Double the number of slots per game"""
+        for name in self.columns():
+            old = getattr(self, name)
+            setattr(self, name, np.concatenate([old, np.zeros_like(old)], axis=1))
+
+    def take(self, rows):
+        """Keep only the given games"""
+        for name in self.columns():
+            setattr(self, name, getattr(self, name)[rows])
+
+class BatchedEngine:
+    """N independent games stepped together
+
+    Each game takes its spawns from a SpawnSchedule on its seed, so game i
+    follows the same trajectory as NeruppuDaaEngine after start_game(seeds[i])
+    given the same actions. Schedule blocks for every game are stacked into
+    (game, frame) arrays, and everything - spawning, movement, culling,
+    collisions, power-ups, timers and scoring - runs as array operations
+    over all live games. All games start together, so the live ones are
+    always on the same frame.
+    """
+    def __init__(self, seeds, width=60, height=20, capacity=64):
+        self.seeds = list(seeds)
+        self.width = width
+        self.height = height
+        n = len(self.seeds)
+
+        # Final results, indexed by original game number
+        self.frames = np.zeros(n, dtype=np.int64)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.killer_glyph = np.full(n, -1, dtype=np.int16)
+        self.killer_speed = np.zeros(n, dtype=np.float64)
+        self.power_ups_collected = np.zeros(n, dtype=np.int64)
+        self.shield_saves = np.zeros(n, dtype=np.int64)
+
+        # Working state, one row per live game (ids map rows back to games)
+        self.ids = np.arange(n)
+        self.schedules = [SpawnSchedule(seed, width) for seed in self.seeds]
+        self.block = None  # (number, stacked roll() columns indexed by game id)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.ones(n, dtype=np.int64)
+        self.player_x = np.full(n, width // 2, dtype=np.int64)
+        self.player_y = height - 2
+        self.shield = np.zeros(n, dtype=bool)
+        self.double_points = np.zeros(n, dtype=bool)
+        self.double_points_timer = np.zeros(n, dtype=np.int64)
+        self.slow_motion = np.zeros(n, dtype=bool)
+        self.slow_motion_timer = np.zeros(n, dtype=np.int64)
+        self.collected = np.zeros(n, dtype=np.int64)
+        self.saves = np.zeros(n, dtype=np.int64)
+        self.fire = EntityBuffer(n, capacity)
+        self.power = EntityBuffer(n, max(8, capacity // 8))
+
+    @property
+    def live(self):
+        """Number of games still playing"""
+        return len(self.ids)
+
+    def step(self, actions=None):
+        """Advance every live game by one frame
+
+        actions holds one INPUT_LEFT/INPUT_RIGHT bitmask per live game
+        (in the order of self.ids); None means nobody moves.
+        """
+        if not self.live:
+            return
+
+        # Movement (NeruppuDaaEngine.move_player)
+        if actions is not None:
+            actions = np.asarray(actions)
+            x = self.player_x
+            x[((actions & INPUT_LEFT) != 0) & (x > 1)] -= 2
+            x[((actions & INPUT_RIGHT) != 0) & (x < self.width - 2)] += 2
+
+        self.frame += 1
+        self._spawn()
+        self._advance(self.fire, None)
+        self._advance(self.power, 0.6)
+        over = self._check_collisions()
+        self._update_timers()
+        self.score += np.where(self.double_points, 3, 2)
+
+        if over.any():
+            self._retire(over)
+
+    def run(self, policy=None, max_frames=None):
+        """Step until every game is over (or max_frames have passed)
+
+        policy(engine) returns the actions for the live games each frame.
+        """
+        frames = 0
+        while self.live and (max_frames is None or frames < max_frames):
+            self.step(policy(self) if policy is not None else None)
+            frames += 1
+        if self.live:
+            self._retire(np.ones(self.live, dtype=bool))
+        return self
+
+    def _spawn(self):
+        """Take this frame's spawns from the stacked schedule blocks"""
+        number, i = divmod(int(self.frame[0]), SPAWN_BLOCK)
+        if self.block is None or self.block[0] != number:
+            self._roll_block(number)
+        fire, fire_x, speed, fire_glyph, power, power_x, power_glyph = self.block[1]
+        ids = self.ids
+
+        rows = np.flatnonzero(fire[ids, i])
+        games = ids[rows]
+        self.fire.spawn(rows, fire_x[games, i], speed[games, i], fire_glyph[games, i], self.frame[rows])
+        rows = np.flatnonzero(power[ids, i])
+        games = ids[rows]
+        self.power.spawn(rows, power_x[games, i], 0.6, power_glyph[games, i], self.frame[rows])
+
+    def _roll_block(self, number):
+        """Stack one schedule block of every live game, rows by game id"""
+        columns = None
+        for game in self.ids.tolist():
+            rolled = self.schedules[game].roll(number)
+            if columns is None:
+                columns = [np.zeros((len(self.seeds),) + column.shape, dtype=column.dtype)
+                           for column in rolled]
+            for stacked, column in zip(columns, rolled):
+                stacked[game] = column
+        self.block = number, columns
+
+    def _advance(self, buffer, speed):
+        """Move entities down and drop the ones that left the board"""
+        multiplier = np.where(self.slow_motion, 0.5, 1.0)[:, None]
+        step = (buffer.speed if speed is None else speed) * multiplier
+        np.add(buffer.y, step, out=buffer.y, where=buffer.active)
+        buffer.active &= buffer.y < self.height
+
+    def _hits(self, buffer):
+        """Entities within one column and one row of each player"""
+        return (buffer.active &
+                (np.abs(buffer.x - self.player_x[:, None]) <= 1) &
+                (np.abs(buffer.y - self.player_y) <= 1))
+
+    def _check_collisions(self):
+        """Resolve fire and power-up hits, return the games that just ended"""
+        over = np.zeros(self.live, dtype=bool)
+
+        # Only the first stone (in spawn order) that hits counts
+        hits = self._hits(self.fire)
+        struck = hits.any(axis=1)
+        if struck.any():
+            rows = np.flatnonzero(struck)
+            slots = np.argmin(np.where(hits[rows], self.fire.spawned[rows], NO_SLOT), axis=1)
+            self.fire.active[rows, slots] = False
+
+            shielded = self.shield[rows]
+            self.shield[rows[shielded]] = False
+            self.saves[rows[shielded]] += 1
+
+            hurt = rows[~shielded]
+            self.lives[hurt] -= 1
+            dead = hurt[self.lives[hurt] <= 0]
+            over[dead] = True
+            killed = np.isin(rows, dead)
+            self.killer_glyph[self.ids[dead]] = self.fire.glyph[rows[killed], slots[killed]]
+            self.killer_speed[self.ids[dead]] = self.fire.speed[rows[killed], slots[killed]]
+
+        # Power-ups are only collected on frames without a stone hit
+        hits = self._hits(self.power) & ~struck[:, None]
+        if hits.any():
+            kinds = np.where(hits, self.power.glyph, 255)
+            got = lambda kind: (kinds == kind).any(axis=1)
+            double_points = got(DOUBLE_POINTS)
+            self.double_points |= double_points
+            self.double_points_timer[double_points] = 180
+            slow_motion = got(SLOW_MOTION)
+            self.slow_motion |= slow_motion
+            self.slow_motion_timer[slow_motion] = 120
+            self.shield |= got(EXTRA_LIFE) | got(SHIELD)
+
+            count = hits.sum(axis=1)
+            self.score += 50 * count
+            self.collected += count
+            self.power.active &= ~hits
+
+        return over
+
+    def _update_timers(self):
+        """Tick power-up timers (NeruppuDaaEngine.update_power_up_timers)"""
+        for flag, timer in ((self.double_points, self.double_points_timer),
+                            (self.slow_motion, self.slow_motion_timer)):
+            running = timer > 0
+            timer[running] -= 1
+            flag &= running
+
+    def _retire(self, finished):
+        """Record results for the finished games and drop them from the batch"""
+        ids = self.ids[finished]
+        self.frames[ids] = self.frame[finished]
+        self.scores[ids] = self.score[finished]
+        self.game_over[ids] = self.lives[finished] <= 0
+        self.power_ups_collected[ids] = self.collected[finished]
+        self.shield_saves[ids] = self.saves[finished]
+
+        keep = np.flatnonzero(~finished)
+        self.ids = self.ids[keep]
+        for name in ('frame', 'score', 'lives', 'player_x', 'shield', 'double_points',
+                     'double_points_timer', 'slow_motion', 'slow_motion_timer',
+                     'collected', 'saves'):
+            setattr(self, name, getattr(self, name)[keep])
+        self.fire.take(keep)
+        self.power.take(keep)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+NERUPPU DAA - Hot path benchmarks
+Times draw_game, update_fire_brimstone, update_power_ups and
+check_collisions on synthetic boards and compares against a baseline
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+from neruppu_daa import (Colors, NeruppuDaaGame, FIRE_CHARS, POWER_UP_TYPES)
+
+BOARD_SIZES = ((60, 20), (120, 40), (200, 60), (400, 120))
+DENSITIES = (0.01, 0.05, 0.20)  # fire stones per field cell
+POWER_UP_RATIO = 0.05            # power-ups per fire stone
+
+class NullSink:
+    """Binary stdout stand-in that throws frames away"""
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+def make_game(width, height, density, seed=0, render_mode='full'):
+    """Headless game (no listener, no mixer) with a synthetic population"""
+    game = NeruppuDaaGame(render_mode=render_mode, headless=True, seed=seed,
+                          width=width, height=height)
+    game.renderer.out = NullSink()
+    game.start_game()
+
+    rng = np.random.default_rng(seed)
+    stones = int(density * (width - 2) * height)
+    game.fire_brimstone.spawn_many(
+        rng.integers(1, width - 1, size=stones),
+        rng.uniform(0, height - 1, size=stones),
+        rng.uniform(0.8, 3.0, size=stones),
+        rng.integers(0, len(FIRE_CHARS), size=stones),
+    )
+    power_ups = int(stones * POWER_UP_RATIO)
+    game.power_ups.spawn_many(
+        rng.integers(1, width - 1, size=power_ups),
+        rng.uniform(0, height - 1, size=power_ups),
+        np.full(power_ups, 0.6),
+        rng.integers(0, len(POWER_UP_TYPES), size=power_ups),
+    )
+    return game
+
+def save_state(game):
+    """Copy everything the measured phases mutate"""
+    stores = []
+    for store in (game.fire_brimstone, game.power_ups):
+        n = len(store)
+        stores.append((store, store.x[:n].copy(), store.y[:n].copy(),
+                       store.speed[:n].copy(), store.glyph[:n].copy()))
+    return stores, (game.score, game.lives, game.shield_active, game.game_state)
+
+def restore_state(game, saved):
+    stores, (game.score, game.lives, game.shield_active, game.game_state) = saved
+    for store, x, y, speed, glyph in stores:
+        store.clear()
+        store.spawn_many(x, y, speed, glyph)
+
+def measure(setup, fn, repeat):
+    """Median and p95 of fn() in microseconds, running setup() untimed before each call"""
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(repeat):
+        setup()
+        start = clock()
+        fn()
+        samples.append(clock() - start)
+    samples = np.array(samples) / 1000.0
+    return {'median_us': round(float(np.median(samples)), 3),
+            'p95_us': round(float(np.percentile(samples, 95)), 3),
+            'repeat': repeat}
+
+def bench_board(width, height, density, repeat):
+    """All hot-path timings for one board size and density"""
+    results = {}
+    game = make_game(width, height, density)
+    saved = save_state(game)
+    reset = lambda: restore_state(game, saved)
+    results['update_fire_brimstone'] = measure(reset, game.update_fire_brimstone, repeat)
+    results['update_power_ups'] = measure(reset, game.update_power_ups, repeat)
+
+    # Park the player on a busy column so the hit path is exercised too
+    game.player_pos.x = int(np.bincount(game.fire_brimstone.x[:len(game.fire_brimstone)]).argmax())
+    results['check_collisions'] = measure(reset, game.check_collisions, repeat)
+    reset()
+
+    results['draw_game[full]'] = measure(lambda: None, game.draw_game, repeat)
+
+    # Diff frames need something to change: let the stones fall between frames
+    game = make_game(width, height, density, render_mode='diff')
+    game.draw_game()
+    def fall():
+        store = game.fire_brimstone
+        store.advance(1.0)
+        store.y[:len(store)] %= height
+    results['draw_game[diff]'] = measure(fall, game.draw_game, repeat)
+    return results
+
+def run_suite(sizes, densities, repeat):
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+        },
+        'results': {},
+    }
+    for width, height in sizes:
+        for density in densities:
+            for name, stats in bench_board(width, height, density, repeat).items():
+                key = f"{name}/{width}x{height}/d{density:g}"
+                report['results'][key] = stats
+                print(f"{key:<45} {stats['median_us']:>10.1f}us  (p95 {stats['p95_us']:.1f}us)")
+    return report
+
+def compare(report, baseline, tolerance):
+    """Print per-case change against baseline, return the regressed case names"""
+    regressions = []
+    print()
+    print(f"{Colors.CYAN}Comparison against baseline (tolerance {tolerance:.0%}){Colors.RESET}")
+    for key, stats in report['results'].items():
+        old = baseline['results'].get(key)
+        if old is None:
+            print(f"{key:<45} {'new':>10}")
+            continue
+        change = stats['median_us'] / old['median_us'] - 1.0 if old['median_us'] else 0.0
+        if change > tolerance:
+            regressions.append(key)
+            color = Colors.RED
+        elif change < -tolerance:
+            color = Colors.GREEN
+        else:
+            color = ''
+        print(f"{color}{key:<45} {change:>+10.1%}{Colors.RESET if color else ''}")
+    return regressions
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark NERUPPU DAA hot paths")
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=list(BOARD_SIZES),
+                        metavar='WxH', help="board sizes (default: 60x20 120x40 200x60 400x120)")
+    parser.add_argument('--densities', nargs='+', type=float, default=list(DENSITIES),
+                        help="fire stones per field cell")
+    parser.add_argument('--repeat', type=int, default=200, help="timed calls per case")
+    parser.add_argument('--output', metavar='PATH', help="write results as JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a stored JSON run")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.densities, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{Colors.RED}{len(regressions)} regression(s) over {args.tolerance:.0%}{Colors.RESET}")
+            return 1
+        print(f"{Colors.GREEN}No regressions{Colors.RESET}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
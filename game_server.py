@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+NERUPPU DAA - Multi-session game server
+Hosts many independent games in one process over telnet or raw TCP,
+all advanced by one shared tick loop
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+
+from neruppu_daa import (Colors, FixedTimestep, FrameBroadcast, GameState, Leaderboard,
+                         NeruppuDaaGame, TimingHistogram, TICK_RATE, default_leaderboard_path)
+
+# Telnet: ask the client for character mode with no local echo
+IAC, SB, SE = 255, 250, 240
+WILL, WONT, DO, DONT = 251, 252, 253, 254
+ECHO, SUPPRESS_GO_AHEAD = 1, 3
+TELNET_HELLO = bytes((IAC, WILL, ECHO, IAC, WILL, SUPPRESS_GO_AHEAD))
+
+HIDE_CURSOR = b'\033[?25l'
+SHOW_CURSOR = b'\033[?25h'
+CLEAR_SCREEN = b'\033[2J\033[H'
+
+# Client bytes -> KeyInput key names (arrows arrive as ESC [ C / ESC [ D)
+KEYS = {ord('a'): 'a', ord('A'): 'a', ord('d'): 'd', ord('D'): 'd',
+        ord(' '): 'space', ord('q'): 'q', ord('Q'): 'q', ord('r'): 'r', ord('R'): 'r',
+        ord('n'): 'n', ord('N'): 'n', 3: 'q'}  # Ctrl-C
+ARROWS = {ord('C'): 'right', ord('D'): 'left'}
+
+HIGH_WATER = 64 * 1024  # unsent bytes at which a session's frames are skipped
+
+class KeyDecoder:
+    """Turn a client byte stream into key taps, dropping telnet negotiation
+
+    A terminal sends nothing on key release, and a held key arrives as a
+    stream of auto-repeats, so every byte is a press and release in one;
+    KeyInput still sees the key for the tick it arrives in. Escape
+    sequences other than left/right are skipped whole, and an Esc at the
+    end of a read only holds back itself: whatever comes next settles it.
+    """
+    def __init__(self):
+        self.pending = b''
+
+    def feed(self, data):
+        """Decode data, return the key names in order (incomplete tails wait for more)"""
+        data = self.pending + data
+        keys = []
+        i, n = 0, len(data)
+        while i < n:
+            byte = data[i]
+            if byte == IAC:
+                if i + 1 >= n:
+                    break
+                command = data[i + 1]
+                if command == SB:
+                    end = data.find(bytes((IAC, SE)), i + 2)
+                    if end < 0:
+                        break
+                    i = end + 2
+                elif command in (WILL, WONT, DO, DONT):
+                    if i + 2 >= n:
+                        break
+                    i += 3
+                else:
+                    i += 2  # IAC IAC (a literal 255) and two-byte commands
+                continue
+            if byte == 0x1b:
+                if i + 1 >= n:
+                    break  # can't tell the Esc key from an arrow yet; the next byte decides
+                if data[i + 1] in b'[O':
+                    # Escape sequence: parameters, then a final byte in 0x40-0x7e
+                    end = i + 2
+                    while end < n and not 0x40 <= data[end] <= 0x7e:
+                        end += 1
+                    if end >= n:
+                        break
+                    if data[end] in ARROWS:
+                        keys.append(ARROWS[data[end]])
+                    i = end + 1
+                    continue
+                # A lone Esc press: ignore it, the byte after it is a key of its own
+            elif byte in KEYS:
+                keys.append(KEYS[byte])
+            i += 1
+        self.pending = data[i:]
+        return keys
+
+class GameSession(asyncio.Protocol):
+    """One connected player: a headless game fed by socket bytes
+
+    The session does nothing on its own; GameServer.tick() steps every
+    session once per tick. The game's renderer writes straight into the
+    transport, and frames are skipped while the client is too far behind.
+    Spectators watch through the session's FrameBroadcast, which is only
+    fed while someone is watching.
+    """
+    def __init__(self, server, number, seed):
+        self.server = server
+        self.number = number
+        self.seed = seed
+        self.transport = None
+        self.game = None
+        self.keys = KeyDecoder()
+        self.screen = None  # GameState whose static screen is showing
+        self.broadcast = FrameBroadcast(newline=b'\r\n')
+
+        # Accounting
+        self.cpu_ns = 0
+        self.ticks = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.frames = 0
+        self.skipped_frames = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        server = self.server
+        self.game = NeruppuDaaGame(render_mode=server.render_mode, headless=True, seed=self.seed,
+                                   leaderboard=server.leaderboard, player=f"guest{self.number}")
+        self.game.renderer.out = self
+        self.send(TELNET_HELLO + HIDE_CURSOR)
+        server.sessions.append(self)
+
+    def data_received(self, data):
+        self.bytes_in += len(data)
+        game_input = self.game.input
+        for key in self.keys.feed(data):
+            game_input.press(key)
+            game_input.release(key)
+
+    def connection_lost(self, exc):
+        self.close()
+
+    # Renderer sink
+    def write(self, data):
+        self.send(data.replace(b'\n', b'\r\n'))  # the client's terminal is raw
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def send(self, data):
+        self.bytes_out += len(data)
+        self.transport.write(data)
+
+    def tick(self):
+        """Input, one simulation step and a frame for this session"""
+        start = time.thread_time_ns()
+        game = self.game
+        game.tick()
+        if not game.running:
+            self.send(SHOW_CURSOR + CLEAR_SCREEN + b"Thanks for playing NERUPPU DAA!\r\n")
+            self.transport.close()
+            self.close()
+        else:
+            self.draw()
+        self.ticks += 1
+        self.cpu_ns += time.thread_time_ns() - start
+
+    def draw(self):
+        game = self.game
+        state = game.game_state
+        broadcast = self.broadcast
+        # Client is behind: drop this frame, the next one still diffs against what it has
+        behind = self.transport.get_write_buffer_size() >= HIGH_WATER
+        if state == GameState.PLAYING:
+            if broadcast.viewers:
+                rows, styles = game.frame_rows()
+                broadcast.publish(rows, styles)
+                if not behind:
+                    game.present(rows, styles)
+            else:
+                broadcast.idle()
+                if not behind:
+                    game.draw_game()
+        elif state == self.screen:
+            broadcast.resync()
+            return
+        else:
+            text = game.menu_text() if state == GameState.MENU else game.game_over_text()
+            screen = CLEAR_SCREEN + text.encode().replace(b'\n', b'\r\n') + b'\r\n'
+            broadcast.publish_screen(screen)
+            if not behind:
+                game.renderer.invalidate()
+                self.send(screen)
+        if behind:
+            self.skipped_frames += 1
+            return
+        self.screen = state
+        self.frames += 1
+
+    def close(self):
+        server = self.server
+        if self in server.sessions:
+            server.sessions.remove(self)
+            server.closed = [total + value for total, value in zip(server.closed, self.stats())]
+            broadcast = self.broadcast
+            server.broadcast_totals = [total + value for total, value in zip(
+                server.broadcast_totals, (broadcast.frames, broadcast.encode_ns, broadcast.send_ns, broadcast.lagged))]
+            for viewer in list(broadcast.viewers):
+                viewer.watch(server.featured())
+            if server.log_sessions:
+                print(self.stats_line())
+                if broadcast.frames:
+                    print(f"  {broadcast.stats_line()}")
+
+    def stats(self):
+        return (self.ticks, self.cpu_ns, self.bytes_in, self.bytes_out, self.frames, self.skipped_frames)
+
+    def stats_line(self):
+        """Per-session CPU and bandwidth"""
+        cpu_us = self.cpu_ns / self.ticks / 1000 if self.ticks else 0.0
+        seconds = self.ticks / TICK_RATE or 1
+        return (f"guest{self.number}: {self.ticks:,} ticks | {cpu_us:.0f}us CPU/tick | "
+                f"in {self.bytes_in / seconds:,.0f} B/s | out {self.bytes_out / seconds:,.0f} B/s | "
+                f"frames {self.frames:,} (skipped {self.skipped_frames:,})")
+
+class SpectatorSession(asyncio.Protocol):
+    """A viewer on the spectator port: watches one game, N switches game, Q leaves"""
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.watching = None
+        self.keys = KeyDecoder()
+        self.bytes_out = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.write(TELNET_HELLO + HIDE_CURSOR)
+        self.server.spectators.add(self)
+        self.watch(self.server.featured())
+
+    def data_received(self, data):
+        for key in self.keys.feed(data):
+            if key == 'q':
+                self.write(SHOW_CURSOR + CLEAR_SCREEN)
+                self.transport.close()
+                return
+            if key == 'n':
+                self.watch(self.server.next_session(self.watching))
+
+    def connection_lost(self, exc):
+        self.watch(None)
+        self.server.spectators.discard(self)
+
+    def watch(self, session):
+        if self.watching is not None:
+            self.watching.broadcast.unsubscribe(self)
+        self.watching = session
+        if session is not None:
+            session.broadcast.subscribe(self)
+        elif not self.transport.is_closing():
+            self.write(CLEAR_SCREEN + b"No games running - press N to look again, Q to leave\r\n")
+
+    # FrameBroadcast viewer
+    def write(self, data):
+        self.bytes_out += len(data)
+        self.transport.write(data)
+
+    def backlog(self):
+        return self.transport.get_write_buffer_size()
+
+class GameServer:
+    """Accepts players and steps every session from one fixed-rate tick loop"""
+    def __init__(self, render_mode='diff', leaderboard=None, seed=None, log_sessions=False):
+        self.render_mode = render_mode
+        self.log_sessions = log_sessions  # print each session's accounting when it leaves
+        self.leaderboard = leaderboard
+        self.seeds = random.Random(seed)  # each session gets its own game seed
+        self.numbers = itertools.count(1)
+        self.sessions = []
+        self.closed = [0] * 6  # summed stats() of sessions that have left
+        self.spectators = set()
+        self.broadcast_totals = [0] * 4  # frames, encode_ns, send_ns, lagged of sessions that have left
+        self.spectator_listener = None
+        self.scheduler = FixedTimestep()
+        self.tick_time = TimingHistogram()  # wall time to step every session once
+        self.peak_sessions = 0
+
+    def protocol(self):
+        return GameSession(self, next(self.numbers), self.seeds.getrandbits(63))
+
+    def featured(self):
+        """Game a new spectator is shown: the best score in play, else any"""
+        playing = [session for session in self.sessions if session.game.game_state == GameState.PLAYING]
+        if playing:
+            return max(playing, key=lambda session: session.game.score)
+        return self.sessions[0] if self.sessions else None
+
+    def next_session(self, session):
+        if not self.sessions:
+            return None
+        if session not in self.sessions:
+            return self.featured()
+        return self.sessions[(self.sessions.index(session) + 1) % len(self.sessions)]
+
+    async def serve(self, host, port, spectator_port=None):
+        """Start listening (port 0 picks a free port); returns the player and spectator ports"""
+        loop = asyncio.get_running_loop()
+        self.listener = await loop.create_server(self.protocol, host, port)
+        if spectator_port is not None:
+            self.spectator_listener = await loop.create_server(lambda: SpectatorSession(self), host, spectator_port)
+            spectator_port = self.spectator_listener.sockets[0].getsockname()[1]
+        self.ticker = asyncio.ensure_future(self.run())
+        return self.listener.sockets[0].getsockname()[1], spectator_port
+
+    async def run(self):
+        """Shared tick loop - sessions never sleep on their own"""
+        scheduler = self.scheduler
+        scheduler.reset()
+        while True:
+            for _ in range(scheduler.due_ticks(scheduler.clock())):
+                self.tick()
+            await asyncio.sleep(max(0.0, scheduler.next_tick - scheduler.clock()))
+
+    def tick(self):
+        start = time.perf_counter_ns()
+        for session in list(self.sessions):
+            session.tick()
+        self.tick_time.add(time.perf_counter_ns() - start)
+        self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+
+    async def close(self):
+        self.ticker.cancel()
+        for listener in (self.listener, self.spectator_listener):
+            if listener is not None:
+                listener.close()
+                await listener.wait_closed()
+        for spectator in list(self.spectators):
+            spectator.transport.close()
+        for session in list(self.sessions):
+            session.transport.close()
+            session.close()
+
+    def totals(self):
+        """Summed (ticks, cpu_ns, bytes_in, bytes_out, frames, skipped) over every session"""
+        rows = [self.closed] + [session.stats() for session in self.sessions]
+        return [sum(column) for column in zip(*rows)]
+
+    def stats_line(self):
+        """Whole-server load: tick time against the tick budget, and per-session cost"""
+        ticks, cpu_ns, bytes_in, bytes_out, frames, skipped = self.totals()
+        budget_ns = 1e9 / TICK_RATE
+        per_tick = cpu_ns / ticks if ticks else 0.0
+        seconds = ticks / TICK_RATE or 1
+        hist = self.tick_time
+        line = (f"Sessions: {len(self.sessions):,} now, {self.peak_sessions:,} peak | "
+                f"Tick p50 {hist.percentile(50) / 1e6:.1f}ms p99 {hist.percentile(99) / 1e6:.1f}ms "
+                f"(budget {budget_ns / 1e6:.0f}ms) | Missed deadlines: {self.scheduler.missed_deadlines:,} | "
+                f"CPU/session-tick {per_tick / 1000:.0f}us (~{budget_ns / per_tick if per_tick else 0:,.0f} sessions/core) | "
+                f"Out {bytes_out / seconds:,.0f} B/s per session | Frames skipped {skipped:,}/{frames + skipped:,}")
+        rows = [self.broadcast_totals] + [(b.frames, b.encode_ns, b.send_ns, b.lagged)
+                                          for b in (session.broadcast for session in self.sessions)]
+        frames, encode_ns, send_ns, lagged = (sum(column) for column in zip(*rows))
+        if frames:
+            line += (f"\nSpectators: {len(self.spectators):,} | Broadcast frames {frames:,} | "
+                     f"encode {encode_ns / frames / 1000:.0f}us/frame | send {send_ns / frames / 1000:.0f}us/frame | "
+                     f"lagged viewers put back on a keyframe: {lagged:,}")
+        return line
+
+async def loopback_client(port, seconds, rng, host='127.0.0.1'):
+    """Scripted player: starts a game, wanders left and right, restarts when it dies"""
+    reader, writer = await asyncio.open_connection(host, port)
+    received = 0
+
+    async def drain():
+        nonlocal received
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            received += len(data)
+
+    reading = asyncio.ensure_future(drain())
+    loop = asyncio.get_running_loop()
+    end = loop.time() + seconds
+    await asyncio.sleep(rng.random() / TICK_RATE)  # spread clients across the tick
+    while loop.time() < end:
+        writer.write(rng.choice((b' ', b'r', b'a', b'a', b'd', b'd', b'\033[D', b'\033[C', b'')))
+        await asyncio.sleep(1.0 / TICK_RATE)
+    writer.write(b'q')
+    await asyncio.sleep(2.0 / TICK_RATE)
+    reading.cancel()
+    writer.close()
+    return received
+
+async def loopback_spectator(port, seconds, host='127.0.0.1'):
+    """Watcher: reads whatever the featured game sends until time is up"""
+    reader, writer = await asyncio.open_connection(host, port)
+    received = 0
+    loop = asyncio.get_running_loop()
+    end = loop.time() + seconds
+    while True:
+        try:
+            data = await asyncio.wait_for(reader.read(65536), max(0.0, end - loop.time()))
+        except asyncio.TimeoutError:
+            break
+        if not data:
+            break
+        received += len(data)
+    writer.write(b'q')
+    writer.close()
+    return received
+
+async def loopback_bench(server, clients, seconds, seed, spectators=0):
+    """Run clients scripted players (and spectators watching them) in this process"""
+    port, spectator_port = await server.serve('127.0.0.1', 0, 0 if spectators else None)
+    rng = random.Random(seed)
+    tasks = [loopback_client(port, seconds, random.Random(rng.getrandbits(64))) for _ in range(clients)]
+    if spectators:
+        await asyncio.sleep(0.5)  # let the players start a game first
+        tasks += [loopback_spectator(spectator_port, seconds - 1.0) for _ in range(spectators)]
+    received = await asyncio.gather(*tasks)
+    await server.close()
+    return sum(received)
+
+def raise_open_file_limit(wanted):
+    """Each loopback client needs two sockets - lift the soft limit if we can"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        limit = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+
+async def serve_forever(server, host, port, spectator_port, stats_interval):
+    port, spectator_port = await server.serve(host, port, spectator_port)
+    print(f"{Colors.GREEN}🔥 NERUPPU DAA server on {host}:{port} - connect with: telnet {host} {port}{Colors.RESET}")
+    if spectator_port is not None:
+        print(f"{Colors.CYAN}Spectators: telnet {host} {spectator_port} (N = next game, Q = leave){Colors.RESET}")
+    while True:
+        await asyncio.sleep(stats_interval or 3600)
+        if stats_interval:
+            print(server.stats_line())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many NERUPPU DAA games in one process")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=2323, help="TCP port (default: %(default)s)")
+    parser.add_argument('--spectator-port', type=int, metavar='PORT',
+                        help="also let people watch running games on PORT")
+    parser.add_argument('--render', choices=['full', 'diff'], default='diff',
+                        help="frame encoding sent to clients (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=None, help="seed for the per-session game seeds")
+    parser.add_argument('--leaderboard', metavar='PATH', nargs='?', const=default_leaderboard_path(),
+                        help="record finished runs in a SQLite leaderboard (default path if none given)")
+    parser.add_argument('--stats', type=float, default=0, metavar='SECONDS',
+                        help="print server load every SECONDS")
+    parser.add_argument('--loopback', type=int, metavar='N',
+                        help="benchmark: run N scripted clients over loopback instead of serving")
+    parser.add_argument('--seconds', type=float, default=10.0, help="with --loopback: how long to play")
+    parser.add_argument('--spectators', type=int, default=0, metavar='M',
+                        help="with --loopback: also run M spectators watching the featured game")
+    parser.add_argument('--sessions', action='store_true',
+                        help="print each session's CPU and bandwidth when it disconnects")
+    args = parser.parse_args(argv)
+
+    leaderboard = Leaderboard(args.leaderboard) if args.leaderboard else None
+    server = GameServer(render_mode=args.render, leaderboard=leaderboard, seed=args.seed,
+                        log_sessions=args.sessions)
+    try:
+        if args.loopback:
+            raise_open_file_limit(2 * (args.loopback + args.spectators) + 64)
+            start = time.perf_counter()
+            received = asyncio.run(loopback_bench(server, args.loopback, args.seconds, args.seed,
+                                                  args.spectators))
+            elapsed = time.perf_counter() - start
+            watchers = f" + {args.spectators:,} spectators" if args.spectators else ""
+            print(f"{Colors.CYAN}{args.loopback:,} loopback clients{watchers} for {elapsed:.1f}s | "
+                  f"received {received / elapsed / 1e6:,.2f} MB/s{Colors.RESET}")
+        else:
+            asyncio.run(serve_forever(server, args.host, args.port, args.spectator_port, args.stats))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if leaderboard is not None:
+            leaderboard.close()
+    print(server.stats_line())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
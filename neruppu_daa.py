@@ -5,18 +5,29 @@ ASCII terminal survival game built with pynput keyboard input
 """
 
 import time
+STARTUP_CLOCK = time.perf_counter()  # time-to-first-frame is measured from here
+import bisect
+import hashlib
+import json
+import os
+import queue
+import struct
+import threading
 import random
 import sys
 from dataclasses import dataclass
-from typing import List
 from enum import Enum
-from pynput import keyboard
+from itertools import groupby
+from typing import NamedTuple
+import numpy as np
 try:
-    import pygame
-    SOUND_ENABLED = True
+    from pynput import keyboard
 except ImportError:
-    SOUND_ENABLED = False
-    print("pygame not found - game will run without sound")
+    # No display (CI, SSH without X) - only headless play is possible
+    keyboard = None
+# pygame is imported by PygameAudio on its init thread, not at module load
+pygame = None
+SOUND_ENABLED = True
 
 # ANSI Colors (same as pynput test)
 class Colors:
@@ -47,210 +58,2564 @@ class PowerUp:
     type: str
     char: str
 
+FIRE_CHARS = ('o', 'O', '^', 'v', 'x', '%', '&', '~')
+POWER_UP_TYPES = {
+    '*': 'double_points',
+    '+': 'extra_life',
+    '!': 'slow_motion',
+    '#': 'shield'
+}
+POWER_UP_CHARS = tuple(POWER_UP_TYPES)
+
+class ColumnIndex:
+    """Entity ids bucketed by x column
+
+    Stones and power-ups fall straight down, so an entity only changes
+    bucket when it spawns or is removed - nothing to do as y advances.
+    """
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, entity_id, x):
+        bucket = self.buckets.get(x)
+        if bucket is None:
+            bucket = self.buckets[x] = set()
+        bucket.add(entity_id)
+
+    def discard(self, entity_id, x):
+        bucket = self.buckets.get(x)
+        if bucket is not None:
+            bucket.discard(entity_id)
+            if not bucket:
+                del self.buckets[x]
+
+    def query(self, x_min, x_max):
+        """Ids of every entity in columns x_min..x_max (unordered)"""
+        found = []
+        buckets = self.buckets
+        for x in range(x_min, x_max + 1):
+            bucket = buckets.get(x)
+            if bucket:
+                found.extend(bucket)
+        return found
+
+    def clear(self):
+        self.buckets.clear()
+
+    def copy(self):
+        twin = ColumnIndex()
+        twin.buckets = {x: set(bucket) for x, bucket in self.buckets.items()}
+        return twin
+
+NO_ROWS = np.empty(0, dtype=np.intp)
+
+class EntityStore:
+    """Struct-of-arrays storage for falling entities
+
+    Columns x, y, speed and glyph live in NumPy arrays so that advancing,
+    culling and spawning are vectorized. Row order is spawn order, which
+    keeps "first entity that hits" identical to the old list behaviour.
+    Iterating or indexing returns dataclass views (FireBrimstone/PowerUp)
+    built from the columns; they are snapshots, mutate through the store.
+
+    Every row also carries a stable id, bucketed by column in a
+    ColumnIndex, so hit tests only look at the columns within reach.
+    """
+    def __init__(self, glyphs, make_view, capacity=64):
+        self.glyphs = tuple(glyphs)
+        self.glyph_codes = {char: code for code, char in enumerate(self.glyphs)}
+        self.make_view = make_view
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.glyph = np.zeros(capacity, dtype=np.uint8)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.next_id = 0
+        self.index = ColumnIndex()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not -self.count <= i < self.count:
+            raise IndexError('entity index out of range')
+        i %= self.count
+        return self.make_view(int(self.x[i]), float(self.y[i]), float(self.speed[i]),
+                              self.glyphs[self.glyph[i]])
+
+    def __iter__(self):
+        n = self.count
+        glyphs = self.glyphs
+        for x, y, speed, code in zip(self.x[:n].tolist(), self.y[:n].tolist(),
+                                     self.speed[:n].tolist(), self.glyph[:n].tolist()):
+            yield self.make_view(x, y, speed, glyphs[code])
+
+    def _reserve(self, extra):
+        """Grow the columns so that extra more rows fit"""
+        needed = self.count + extra
+        capacity = len(self.x)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('x', 'y', 'speed', 'glyph', 'ids'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, x, y, speed, char):
+        """Add one entity"""
+        self._reserve(1)
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.speed[i] = speed
+        self.glyph[i] = self.glyph_codes[char]
+        self.ids[i] = self.next_id
+        self.index.add(self.next_id, x)
+        self.next_id += 1
+        self.count = i + 1
+
+    def spawn_many(self, xs, ys, speeds, codes):
+        """Add a batch of entities (codes index into self.glyphs)"""
+        k = len(xs)
+        if not k:
+            return
+        self._reserve(k)
+        n = self.count
+        self.x[n:n + k] = xs
+        self.y[n:n + k] = ys
+        self.speed[n:n + k] = speeds
+        self.glyph[n:n + k] = codes
+        first_id = self.next_id
+        self.ids[n:n + k] = np.arange(first_id, first_id + k)
+        for entity_id, x in enumerate(self.x[n:n + k].tolist(), first_id):
+            self.index.add(entity_id, x)
+        self.next_id = first_id + k
+        self.count = n + k
+
+    def append(self, entity):
+        """Add an entity given as a FireBrimstone/PowerUp"""
+        self.spawn(entity.pos.x, entity.pos.y, entity.speed if hasattr(entity, 'speed') else 0.0,
+                   entity.char)
+
+    def advance(self, multiplier=1.0):
+        """Move every entity down by speed * multiplier"""
+        n = self.count
+        if not n:
+            return
+        if multiplier == 1.0:
+            self.y[:n] += self.speed[:n]
+        else:
+            self.y[:n] += self.speed[:n] * multiplier
+
+    def cull(self, limit):
+        """Drop entities with y >= limit, keeping the order of the rest"""
+        n = self.count
+        if n:
+            gone = (self.y[:n] >= limit).nonzero()[0]
+            if len(gone):
+                self.remove_rows(gone)
+
+    def hits(self, x, y, reach_x=1, reach_y=1):
+        """Rows within reach_x columns and reach_y rows of (x, y), in spawn order
+
+        Use a wider reach for multi-cell hitboxes; call once per player
+        when there is more than one.
+        """
+        found = self.index.query(x - reach_x, x + reach_x)
+        if not found:
+            return NO_ROWS
+        found.sort()
+        rows = self.ids[:self.count].searchsorted(found)
+        return rows[np.abs(self.y[rows] - y) <= reach_y]
+
+    def remove_rows(self, rows):
+        """Remove the given rows (ascending), keeping the order of the rest"""
+        n = self.count
+        columns = (self.x, self.y, self.speed, self.glyph, self.ids)
+        for entity_id, x in zip(self.ids[rows].tolist(), self.x[rows].tolist()):
+            self.index.discard(entity_id, x)
+
+        if len(rows) <= 2:
+            # Usually one or two stones leave per frame - shifting the tail
+            # down is cheaper than a masked copy of every column
+            for row in reversed(rows.tolist() if isinstance(rows, np.ndarray) else list(rows)):
+                for column in columns:
+                    column[row:n - 1] = column[row + 1:n]
+                n -= 1
+        else:
+            keep = np.ones(n, dtype=bool)
+            keep[rows] = False
+            n -= len(rows)
+            for column in columns:
+                column[:n] = column[:self.count][keep]
+        self.count = n
+
+    def remove(self, entity):
+        """Remove the first row matching a FireBrimstone/PowerUp view"""
+        n = self.count
+        match = np.flatnonzero((self.x[:n] == entity.pos.x) & (self.y[:n] == entity.pos.y) &
+                               (self.glyph[:n] == self.glyph_codes[entity.char]))
+        if not len(match):
+            raise ValueError('entity not in store')
+        self.remove_rows(match[:1])
+
+    def clear(self):
+        self.count = 0
+        self.index.clear()
+
+    def copy(self):
+        """Independent store with the same rows, ids and column index"""
+        twin = EntityStore.__new__(EntityStore)
+        twin.glyphs = self.glyphs
+        twin.glyph_codes = self.glyph_codes
+        twin.make_view = self.make_view
+        twin.count = self.count
+        twin.next_id = self.next_id
+        for name in ('x', 'y', 'speed', 'glyph', 'ids'):
+            setattr(twin, name, getattr(self, name).copy())
+        twin.index = self.index.copy()
+        return twin
+
+def make_fire_brimstone(x, y, speed, char):
+    return FireBrimstone(pos=Position(x, y), speed=speed, char=char)
+
+def make_power_up(x, y, speed, char):
+    return PowerUp(pos=Position(x, y), type=POWER_UP_TYPES[char], char=char)
+
 class GameState(Enum):
     WELCOME = 0
     MENU = 1
     PLAYING = 2
     GAME_OVER = 3
 
-class NeruppuDaaGame:
-    def __init__(self):
-        self.width = 60
-        self.height = 20
-        self.player_pos = Position(self.width // 2, self.height - 2)
-        self.fire_brimstone: List[FireBrimstone] = []
-        self.power_ups: List[PowerUp] = []
-        self.score = 0
-        self.high_score = 0
-        self.lives = 1
-        self.game_state = GameState.MENU
-        self.frame_count = 0
+# Movement input bits (one frame of held keys) and the engine's actions
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+ACTION_STAY = 0
+ACTION_LEFT = INPUT_LEFT
+ACTION_RIGHT = INPUT_RIGHT
+
+def sgr(*codes):
+    """Single SGR sequence that resets attributes and applies codes"""
+    return ('\033[' + ';'.join(('0',) + codes) + 'm').encode()
+
+# Glyph -> SGR bytes for the playing field. Every entry starts with a reset,
+# so switching between styled runs never needs a separate Colors.RESET.
+FIELD_BORDER = '│'
+GLYPH_STYLES = {FIELD_BORDER: sgr('96'), '@': sgr('92', '1')}
+GLYPH_STYLES.update({char: sgr('91', '1') for char in FIRE_CHARS})
+GLYPH_STYLES.update({char: sgr('94', '1') for char in POWER_UP_TYPES})
+SHIELDED_GLYPH_STYLES = dict(GLYPH_STYLES, **{'@': sgr('94', '1')})
+RESET_BYTES = Colors.RESET.encode()
+SPAN_GAP = 6  # unchanged cells worth resending to save a cursor move (ESC[yy;xxH)
+
+class OutputPump:
+    """Background writer so a slow terminal cannot stall the game loop
+
+    Holds at most one frame. While it is still writing, the renderer skips
+    frames instead of queueing them, so whatever reaches the terminal next
+    is always the newest state.
+    """
+    def __init__(self, write):
+        self.write = write
+        self.cond = threading.Condition()
+        self.pending = None
+        self.pending_bytes = 0       # handed over but not yet written
+        self.peak_pending_bytes = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="output-pump", daemon=True)
+        self.thread.start()
+    
+    @property
+    def busy(self):
+        return self.pending_bytes > 0
+    
+    def submit(self, data):
+        with self.cond:
+            self.pending = data
+            self.pending_bytes = len(data)
+            self.peak_pending_bytes = max(self.peak_pending_bytes, self.pending_bytes)
+            self.cond.notify_all()
+    
+    def run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None or self.closed)
+                if self.pending is None:
+                    return
+                data, self.pending = self.pending, None
+            try:
+                self.write(data)
+            except (OSError, ValueError):
+                pass  # terminal gone - nothing left to show it on
+            with self.cond:
+                self.pending_bytes = 0
+                self.cond.notify_all()
+    
+    def drain(self):
+        """Block until the last submitted frame is on the terminal"""
+        with self.cond:
+            self.cond.wait_for(lambda: not self.busy)
+    
+    def close(self):
+        self.drain()
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class TerminalRenderer:
+    """Compose frames into one bytes buffer and write it to the terminal
+
+    A frame is a list of screen rows. Each row is either pre-encoded bytes
+    (header/status lines, compared as a whole) or a str of single-width field
+    glyphs, styled through a glyph style table and compared cell by cell.
+    Neighbouring glyphs with the same style share one escape sequence.
+    In diff mode only the cells that changed since the last frame are sent.
+
+    With threaded=True writes go through an OutputPump: a frame that comes
+    in while the previous one is still being written is skipped before it
+    is even composed, so diffs are always against what the terminal shows.
+    """
+    def __init__(self, diff=False, out=None, threaded=False):
+        self.diff = diff
+        self.out = out if out is not None else sys.stdout.buffer
+        self.prev_rows = None
+        self.prev_styles = None
+        self.pump = OutputPump(self._write) if threaded else None
+        self.recorder = None  # AsciicastRecorder that also gets every frame
+
+        # Output accounting for --render-stats
+        self.frames = 0
+        self.total_bytes = 0
+        self.last_frame_bytes = 0
+        self.peak_frame_bytes = 0
+        self.skipped_frames = 0
+
+    def invalidate(self):
+        """Forget the last frame (call before anything else draws the screen)"""
+        if self.pump is not None:
+            self.pump.drain()  # print()s must not overtake a frame still in flight
+        self.prev_rows = None
+
+    def close(self):
+        """Finish writing (call before printing the exit screen)"""
+        if self.pump is not None:
+            self.pump.close()
+
+    @property
+    def queue_depth(self):
+        """Bytes handed to the writer thread and not yet written"""
+        return self.pump.pending_bytes if self.pump is not None else 0
+
+    def _write(self, data):
+        self.out.write(data)
+        self.out.flush()
+
+    def render(self, rows, styles=GLYPH_STYLES):
+        """Emit one frame with a single write; False if it was skipped under backpressure"""
+        if self.pump is not None and self.pump.busy:
+            self.skipped_frames += 1
+            return False
+
+        data = self.compose(rows, styles)
+        if data:
+            if self.recorder is not None:
+                # After a dropped recording, a diff would build on a screen playback never saw
+                keyframe = self.recorder.want_keyframe and not data.startswith(b'\033[2J')
+                self.recorder.want_keyframe = False
+                self.recorder.write(self._full_frame(rows, styles) if keyframe else data)
+            if self.pump is not None:
+                self.pump.submit(data)
+            else:
+                self._write(data)
+
+        size = len(data)
+        self.frames += 1
+        self.total_bytes += size
+        self.last_frame_bytes = size
+        self.peak_frame_bytes = max(self.peak_frame_bytes, size)
+        return True
+
+    def compose(self, rows, styles=GLYPH_STYLES):
+        """Encode a frame against the last one composed (whole when there is none)"""
+        if self.diff and self.prev_rows is not None and len(self.prev_rows) == len(rows):
+            data = self._diff_frame(rows, styles)
+        else:
+            # Anything print()ed before us must reach the terminal first
+            sys.stdout.flush()
+            data = self._full_frame(rows, styles)
+        self.prev_rows = rows
+        self.prev_styles = styles
+        return data
+
+    def _full_frame(self, rows, styles):
+        """Clear the screen and write every row"""
+        buf = bytearray(b'\033[2J\033[H')
+        current = None
+        for row in rows:
+            if isinstance(row, bytes):
+                buf += row
+                current = None
+            else:
+                current = self._append_cells(buf, row, styles, current)
+            buf += b'\n'
+        if current is not None:
+            buf += RESET_BYTES
+        return bytes(buf)
+
+    def _diff_frame(self, rows, styles):
+        """Write cursor moves and glyph runs only where the frame changed"""
+        buf = bytearray()
+        current = None
+        prev_rows = self.prev_rows
+        prev_styles = self.prev_styles
+        same_styles = styles is prev_styles
+        field = []  # glyph rows to compare cell by cell
+        for y, (row, prev) in enumerate(zip(rows, prev_rows)):
+            if same_styles and row == prev:
+                continue
+
+            if isinstance(row, bytes) or isinstance(prev, bytes) or len(row) != len(prev):
+                if row == prev:
+                    continue
+                # Status line - rewrite it whole and clear any leftovers
+                buf += b'\033[%d;1H' % (y + 1)
+                if isinstance(row, bytes):
+                    buf += row
+                    current = None
+                else:
+                    current = self._append_cells(buf, row, styles, current)
+                buf += b'\033[K'
+                continue
+            field.append(y)
+
+        if field:
+            # One array compare for every changed glyph row (str -> UCS-4 code points)
+            now = np.array([rows[y] for y in field])
+            before = np.array([prev_rows[y] for y in field])
+            changed = now.view(np.uint32).reshape(len(field), -1) != before.view(np.uint32).reshape(len(field), -1)
+            if not same_styles:
+                # Same glyph, new style (e.g. the player turning blue under a shield)
+                for glyph in {char for char in styles.keys() | prev_styles.keys()
+                              if styles.get(char) != prev_styles.get(char)}:
+                    changed |= now.view(np.uint32).reshape(len(field), -1) == ord(glyph)
+
+            # Group changed cells into spans, one cursor move per span. Gaps
+            # shorter than a cursor move are cheaper to resend than to skip.
+            span_row = start = end = None
+            for i, x in zip(*(axis.tolist() for axis in np.nonzero(changed))):
+                if i == span_row and x - end <= SPAN_GAP:
+                    end = x
+                    continue
+                if span_row is not None:
+                    y = field[span_row]
+                    buf += b'\033[%d;%dH' % (y + 1, start + 1)
+                    current = self._append_cells(buf, rows[y][start:end + 1], styles, current)
+                span_row, start, end = i, x, x
+            if span_row is not None:
+                y = field[span_row]
+                buf += b'\033[%d;%dH' % (y + 1, start + 1)
+                current = self._append_cells(buf, rows[y][start:end + 1], styles, current)
+
+        if buf:
+            if current is not None:
+                buf += RESET_BYTES
+            # Park the cursor below the frame like a full repaint would
+            buf += b'\033[%d;1H' % (len(rows) + 1)
+        return bytes(buf)
+
+    @staticmethod
+    def _append_cells(buf, cells, styles, current):
+        """Append glyphs with one SGR sequence per style run, return the active style"""
+        for style, run in groupby(cells, styles.get):
+            if style != current:
+                buf += style if style is not None else RESET_BYTES
+                current = style
+            buf += ''.join(run).encode()
+        return current
+
+    def stats_line(self):
+        """Summary of bytes written per frame"""
+        mode = 'diff' if self.diff else 'full'
+        avg = self.total_bytes / self.frames if self.frames else 0
+        line = (f"Renderer: {mode} | Frames: {self.frames:,} | "
+                f"Avg bytes/frame: {avg:,.0f} | Last: {self.last_frame_bytes:,} | "
+                f"Peak: {self.peak_frame_bytes:,}")
+        if self.pump is not None:
+            line += (f" | Skipped (slow output): {self.skipped_frames:,} | "
+                     f"Output queue: {self.queue_depth:,} bytes, peak {self.pump.peak_pending_bytes:,}")
+        return line
+
+KEYFRAME_EVERY = 10          # broadcast frames between keyframes (1 s at the tick rate)
+VIEWER_HIGH_WATER = 64 * 1024  # unsent bytes at which a viewer counts as lagging
+
+class FrameBroadcast:
+    """Encode each frame once and hand the same bytes to every viewer
+
+    publish() diffs a frame against the previous one a single time and,
+    every KEYFRAME_EVERY frames, also encodes it whole. Both halves live in
+    one immutable bytes object and viewers are given memoryview slices of
+    it, so encoding cost does not grow with the audience. A viewer is any
+    object with write(data) and backlog() (bytes it has not sent yet). One
+    that falls behind, or has just joined, gets no deltas it could not use:
+    it waits for the next keyframe and picks up from there.
+    """
+    def __init__(self, keyframe_every=KEYFRAME_EVERY, high_water=VIEWER_HIGH_WATER, newline=b'\n'):
+        self.encoder = TerminalRenderer(diff=True)  # only compose() is used
+        self.keyframe_every = keyframe_every
+        self.high_water = high_water
+        self.newline = newline  # raw sockets want b'\r\n'
+        self.viewers = set()
+        self.waiting = set()    # viewers that need a keyframe before anything else
+        self.since_keyframe = 0
+        self.latest_keyframe = None  # view of the last keyframe while nothing newer went out
+
+        # Accounting
+        self.frames = 0
+        self.keyframes = 0
+        self.bytes_encoded = 0
+        self.encode_ns = 0
+        self.send_ns = 0
+        self.lagged = 0  # times a viewer fell behind and was put back on a keyframe
+
+    def subscribe(self, viewer):
+        if not self.viewers:
+            self.encoder.invalidate()  # nobody kept the deltas going - start with a whole frame
+        self.viewers.add(viewer)
+        self.waiting.add(viewer)
+        self.resync()
+
+    def unsubscribe(self, viewer):
+        self.viewers.discard(viewer)
+        self.waiting.discard(viewer)
+
+    def idle(self):
+        """A frame went by unpublished (nobody watching) - the last keyframe is stale"""
+        self.latest_keyframe = None
+
+    def publish(self, rows, styles=GLYPH_STYLES):
+        """Encode a frame once and send it to every viewer that can take it"""
+        start = time.perf_counter_ns()
+        encoder = self.encoder
+        whole = encoder.prev_rows is None
+        delta = encoder.compose(rows, styles)
+        if whole:
+            packet = delta.replace(b'\n', self.newline)
+            delta_end = 0
+        elif self.since_keyframe + 1 >= self.keyframe_every:
+            packet = delta + encoder._full_frame(rows, styles).replace(b'\n', self.newline)
+            delta_end = len(delta)
+        else:
+            packet = delta
+            delta_end = None
+        view = memoryview(packet)
+        if delta_end is None:
+            self.since_keyframe += 1
+            self.latest_keyframe = None
+        else:
+            self.since_keyframe = 0
+            self.latest_keyframe = view[delta_end:]
+            self.keyframes += 1
+            view = view[:delta_end] if delta_end else view
+        self.frames += 1
+        self.bytes_encoded += len(packet)
+        self.encode_ns += time.perf_counter_ns() - start
+        self.send(view, self.latest_keyframe)
+
+    def publish_screen(self, data):
+        """Send a whole pre-encoded screen (menus) - it doubles as a keyframe"""
+        self.encoder.invalidate()
+        view = memoryview(data)
+        self.since_keyframe = 0
+        self.latest_keyframe = view
+        self.keyframes += 1
+        self.frames += 1
+        self.bytes_encoded += len(data)
+        self.send(view, view)
+
+    def resync(self):
+        """Give waiting viewers the current keyframe if it is still the newest frame"""
+        if self.waiting and self.latest_keyframe is not None:
+            self.send(None, self.latest_keyframe, self.waiting.copy())
+
+    def send(self, delta, keyframe, viewers=None):
+        start = time.perf_counter_ns()
+        waiting = self.waiting
+        for viewer in self.viewers if viewers is None else viewers:
+            if viewer.backlog() >= self.high_water:
+                if viewer not in waiting:
+                    waiting.add(viewer)
+                    self.lagged += 1
+            elif viewer in waiting:
+                if keyframe is not None:
+                    viewer.write(keyframe)
+                    waiting.discard(viewer)
+            elif delta:
+                viewer.write(delta)
+        self.send_ns += time.perf_counter_ns() - start
+
+    def stats_line(self):
+        """Encoding cost per frame versus fan-out cost"""
+        frames = self.frames or 1
+        return (f"Broadcast: {len(self.viewers):,} viewers | Frames: {self.frames:,} ({self.keyframes:,} keyframes) | "
+                f"Avg {self.bytes_encoded / frames:,.0f} bytes | Encode {self.encode_ns / frames / 1000:.0f}us/frame | "
+                f"Send {self.send_ns / frames / 1000:.0f}us/frame | Lagged: {self.lagged:,}")
+
+class AsciicastRecorder:
+    """Session recording in asciicast v2, written by a background thread
+
+    write() only timestamps the output and puts it on a bounded queue, so
+    recording costs the game loop next to nothing and memory stays fixed
+    however long the session runs. When the queue is full the output is
+    dropped: the next event is preceded by an "m" marker naming the gap,
+    and want_keyframe asks the renderer for a full repaint so playback
+    does not build diffs on a screen it never saw. A path ending in .gz
+    is gzip-compressed.
+    """
+    def __init__(self, path, width, height, queue_size=256, batch=64):
+        import gzip
+        opener = gzip.open if path.endswith('.gz') else open
+        self.file = opener(path, 'wt', encoding='utf-8')
+        self.file.write(json.dumps({'version': 2, 'width': width, 'height': height,
+                                    'timestamp': int(time.time()),
+                                    'env': {'TERM': os.environ.get('TERM', 'xterm-256color')}}) + '\n')
+        self.events = queue.Queue(maxsize=queue_size)
+        self.batch = batch
+        self.start = time.perf_counter()
+        self.want_keyframe = False
+        self.gap = 0  # outputs dropped since the last one that got through
+        self.recorded = self.dropped = self.gaps = 0
+        self.thread = threading.Thread(target=self.run, name="asciicast-writer", daemon=True)
+        self.thread.start()
+    
+    def write(self, data):
+        """Record terminal output (bytes or str) - never blocks"""
+        try:
+            self.events.put_nowait((time.perf_counter() - self.start, data, self.gap))
+        except queue.Full:
+            self.dropped += 1
+            if not self.gap:
+                self.gaps += 1
+            self.gap += 1
+            self.want_keyframe = True
+            return
+        self.gap = 0
+        self.recorded += 1
+    
+    def run(self):
+        """Writer: format queued output as event lines and write them in batches"""
+        while True:
+            items = [self.events.get()]
+            while len(items) < self.batch:
+                try:
+                    items.append(self.events.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for item in items:
+                if item is None:
+                    self.file.write(''.join(lines))
+                    self.file.close()
+                    return
+                at, data, gap = item
+                if gap:
+                    lines.append(json.dumps([round(at, 6), 'm', f"{gap} outputs dropped"]) + '\n')
+                if data is None:
+                    continue
+                if isinstance(data, (bytes, bytearray)):
+                    data = data.decode('utf-8', 'replace')
+                lines.append(json.dumps([round(at, 6), 'o', data]) + '\n')
+            self.file.write(''.join(lines))
+    
+    def close(self):
+        """Flush everything queued and close the file"""
+        if self.gap:
+            self.events.put((time.perf_counter() - self.start, None, self.gap))
+        self.events.put(None)
+        self.thread.join()
+    
+    def stats_line(self):
+        return (f"Recording: {self.recorded:,} outputs | {self.dropped:,} dropped "
+                f"in {self.gaps:,} gaps")
+
+class StdoutTee:
+    """sys.stdout stand-in that also hands print() output to a recorder"""
+    def __init__(self, stream, recorder):
+        self.stream = stream
+        self.recorder = recorder
+    
+    def write(self, text):
+        self.recorder.write(text)
+        return self.stream.write(text)
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+# Sound effect recipes: every number that shapes a waveform lives here, so
+# the on-disk cache key changes whenever a sound does
+SOUND_SYNTH_VERSION = 1
+SOUND_RECIPES = {
+    # Power-up: bright ascending C major arpeggio - (freq, amp, decay, start)
+    'power_up': {'duration': 0.4, 'notes': ((523, 0.3, 8, 0.0), (659, 0.3, 6, 0.1),
+                                            (784, 0.3, 4, 0.2), (1047, 0.2, 2, 0.3))},
+    # Hit: harsh low tone with decay
+    'hit': {'duration': 0.4, 'notes': ((150, 0.6, 2, 0.0),)},
+    # Movement: quick blip
+    'move': {'duration': 0.1, 'notes': ((800, 0.2, 5, 0.0),)},
+    # Game over: Am -> Dm -> low rumble - (freqs, amp, decay, start, end)
+    'gameover': {'duration': 1.2, 'chords': (((220, 261, 329), 0.3, 3, 0.0, 0.4),
+                                             ((146, 174, 220), 0.4, 2, 0.4, 0.8),
+                                             ((87, 110), 0.5, 1, 0.8, None))},
+}
+
+def synthesize_sound(recipe, sample_rate, channels):
+    """Render one SOUND_RECIPES entry as an int16 buffer in the mixer's layout"""
+    duration = recipe['duration']
+    t = np.linspace(0, duration, int(sample_rate * duration), False)
+    wave = np.zeros_like(t)
+    for freq, amp, decay, start in recipe.get('notes', ()):
+        wave += np.sin(freq * 2 * np.pi * t) * amp * np.exp(-decay * (t - start)) * (t > start)
+    for freqs, amp, decay, start, end in recipe.get('chords', ()):
+        gate = (t >= start) & (t < end) if end is not None else (t >= start)
+        for freq in freqs:
+            wave += np.sin(freq * 2 * np.pi * t) * amp * np.exp(-decay * (t - start)) * gate
+    wave = (wave * 32767).astype(np.int16)
+    if channels == 1:
+        return wave
+    return np.ascontiguousarray(np.repeat(wave[:, None], channels, axis=1))
+
+class SoundCache:
+    """Synthesized waveforms stored as .npy files and memory-mapped on load
+
+    The key hashes the recipes together with the mixer format
+    (frequency, size, channels), so a changed sound or mixer setup simply
+    misses and is rebuilt.
+    """
+    def __init__(self, mixer_format, directory=None):
+        if directory is None:
+            base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            directory = os.path.join(base, 'neruppu_daa', 'sounds')
+        self.directory = directory
+        self.mixer_format = tuple(mixer_format)
+        blob = json.dumps([SOUND_SYNTH_VERSION, SOUND_RECIPES, self.mixer_format], sort_keys=True)
+        self.key = hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}-{self.key}.npy")
+
+    def load(self, name):
+        """Memory-mapped buffer, or None if it is missing or unreadable"""
+        try:
+            return np.load(self.path(name), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    def store(self, name, buffer):
+        """Write atomically so a crash never leaves half a file behind"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self.path(name) + f".{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, buffer)
+            os.replace(tmp, self.path(name))
+        except OSError:
+            pass  # read-only home etc. - just synthesize again next time
+
+    def get(self, name, sample_rate, channels):
+        buffer = self.load(name)
+        if buffer is None:
+            buffer = synthesize_sound(SOUND_RECIPES[name], sample_rate, channels)
+            self.store(name, buffer)
+        return buffer
+
+# Background music: short chunks rendered from wavetables and queued one
+# behind the other on a reserved mixer channel
+MUSIC_CHUNK = 0.25         # seconds per chunk - one plays while the next waits
+MUSIC_TABLE_SIZE = 4096    # samples per wavetable cycle (a power of two)
+MUSIC_ROOT = 55.0          # A1
+MUSIC_SCALE = (0, 3, 5, 7, 10, 12, 15, 17, 19, 22, 24)  # A minor pentatonic, semitones
+MUSIC_BASS = (0, 0, 3, 4)  # scale degree of the bass per bar
+MUSIC_ARP = (0, 2, 4, 5, 7, 5, 4, 2)  # scale degrees above the bass, one per eighth note
+MUSIC_VOLUME = 0.22        # loudest the music gets next to the effects
+
+class MusicSynth:
+    """Procedural background music, rendered one chunk at a time
+
+    Voices read precomputed wavetables through phase accumulators, and
+    notes fade along precomputed decay curves, so a chunk costs a few
+    array lookups per voice instead of np.sin over the whole buffer.
+    Phases carry over from chunk to chunk, so the joins are seamless.
+
+    Level 0 is the calm menu loop. From level 1 (the game's difficulty
+    level, 1-16) the tempo rises with the level and voices join in: an
+    arpeggio, an octave above it from level 6 and a hi-hat from level 11.
+    """
+    def __init__(self, sample_rate, channels, chunk=MUSIC_CHUNK):
+        self.rate = sample_rate
+        self.channels = channels
+        self.chunk_samples = int(sample_rate * chunk)
+        
+        # One cycle of each timbre
+        cycle = np.arange(MUSIC_TABLE_SIZE) * (2 * np.pi / MUSIC_TABLE_SIZE)
+        self.sine = np.sin(cycle)
+        self.organ = (np.sin(cycle) + 0.4 * np.sin(2 * cycle) + 0.2 * np.sin(3 * cycle)) / 1.6
+        self.noise = np.random.default_rng(0).uniform(-1.0, 1.0, MUSIC_TABLE_SIZE)
+        
+        # Note envelopes, long enough for the slowest tempo (a bass note lasts half a bar)
+        t = np.arange(4 * self.step_samples(0)) / sample_rate
+        attack = np.minimum(t / 0.004, 1.0)  # no click when a note starts
+        self.thump = np.exp(-2.0 * t) * attack
+        self.pluck = np.exp(-7.0 * t) * attack
+        self.tick = np.exp(-45.0 * t) * attack
+        
+        self.ramp = np.arange(self.chunk_samples, dtype=np.float64)
+        self.mix = np.zeros(self.chunk_samples)
+        self.phases = [0.0] * 4  # bass, arpeggio, high arpeggio, hi-hat
+        self.level = 0
+        self.step = 0            # eighth notes since the music started
+        self.offset = 0          # samples into the current step
+        self.step_level = 0      # level and length are fixed for a whole step
+        self.step_length = self.step_samples(0)
+        self.chunks = 0
+    
+    def step_samples(self, level):
+        """Samples per eighth note: 84 bpm on the menu, 100 rising to 190 in play"""
+        bpm = 84 if level == 0 else 100 + 6 * (level - 1)
+        return int(self.rate * 30 / bpm)
+    
+    def note(self, degree, octave):
+        return MUSIC_ROOT * 2 ** (octave + MUSIC_SCALE[degree] / 12)
+    
+    def voice(self, out, voice, table, freq, envelope, start, amp):
+        """Add one wavetable voice to out, continuing its phase"""
+        n = len(out)
+        step = freq * MUSIC_TABLE_SIZE / self.rate
+        index = self.ramp[:n] * step
+        index += self.phases[voice]
+        self.phases[voice] = (self.phases[voice] + step * n) % MUSIC_TABLE_SIZE
+        wave = table[index.astype(np.intp) & (MUSIC_TABLE_SIZE - 1)]
+        wave *= envelope[start:start + n]
+        wave *= amp
+        out += wave
+    
+    def play_step(self, out, offset):
+        """Render part of the current step, from offset samples into it"""
+        level = self.step_level
+        amp = MUSIC_VOLUME * (0.6 + 0.4 * level / 16)
+        bar, beat = divmod(self.step, len(MUSIC_ARP))
+        root = MUSIC_BASS[bar % len(MUSIC_BASS)]
+        
+        # Bass on every half bar, ringing through the eighth notes after it
+        held = self.step % 4 * self.step_length + offset
+        self.voice(out, 0, self.organ, self.note(root, 0), self.thump, held, amp)
+        if level >= 1:
+            degree = min(root + MUSIC_ARP[beat], len(MUSIC_SCALE) - 1)
+            self.voice(out, 1, self.sine, self.note(degree, 2), self.pluck, offset, amp * 0.5)
+        if level >= 6:
+            self.voice(out, 2, self.sine, self.note(degree, 3), self.pluck, offset, amp * 0.2)
+        if level >= 11 and beat % 2:
+            self.voice(out, 3, self.noise, 5003.0, self.tick, offset, amp * 0.15)
+    
+    def render(self, level):
+        """Next chunk as int16 samples in the mixer's layout; level applies from the next step"""
+        self.level = level
+        mix = self.mix
+        mix[:] = 0.0
+        done = 0
+        while done < len(mix):
+            n = min(len(mix) - done, self.step_length - self.offset)
+            self.play_step(mix[done:done + n], self.offset)
+            done += n
+            self.offset += n
+            if self.offset >= self.step_length:
+                self.step += 1
+                self.offset = 0
+                self.step_level = self.level
+                self.step_length = self.step_samples(self.level)
+        self.chunks += 1
+        wave = (mix * 32767).astype(np.int16)
+        if self.channels == 1:
+            return wave
+        return np.repeat(wave[:, None], self.channels, axis=1)
+
+# Mixer channels reserved per sound type, lowest priority first - a sound
+# only ever plays on its own channels, so blips cannot cut off a game over
+SOUND_CHANNELS = {'move': 1, 'power_up': 2, 'hit': 2, 'gameover': 1}
+SOUND_PRIORITY = tuple(SOUND_CHANNELS)
+MAX_VOICES = 4               # sounds audible at once across all types
+MOVE_COALESCE_WINDOW = 0.15  # seconds - held keys move every tick, blip at most this often
+AUDIO_QUEUE_SIZE = 32
+
+class PygameAudio:
+    """Sound effects through the pygame mixer (the engine's audio adapter)
+
+    With background=True, importing pygame, opening the mixer and loading
+    the sounds happen on a daemon thread so the first frame does not wait
+    for them; play() is a no-op until that thread sets self.ready.
+
+    play() only puts a command on a bounded queue; a dispatch thread owns
+    the mixer, so a stalled audio device can back up (and drop) sounds but
+    never hold up a frame.
+
+    With music=True a MusicSynth plays on a channel of its own, fed by a
+    thread that keeps one chunk playing and the next queued behind it;
+    set music_level to the game's difficulty level (0 off the game).
+    """
+    def __init__(self, background=False, music=True):
+        self.ready = threading.Event()
+        self.status = "loading"
+        self.message = None
+        self.commands = queue.Queue(maxsize=AUDIO_QUEUE_SIZE)
+        self.channels = {}
+        self.started = {}  # channel -> when its current sound began
+        self.last_move = float('-inf')
+        self.played = self.coalesced = self.dropped = self.voice_limited = self.errors = 0
+        self.ready_after = None  # seconds from STARTUP_CLOCK until sound was usable
+        
+        # Background music
+        self.music = None  # MusicSynth once the mixer is up
+        self.music_wanted = music
+        self.music_level = 0
+        self.music_channel = None
+        self.music_thread = None
+        self.music_stop = threading.Event()
+        self.music_underruns = 0
+        self.music_cpu = 0.0   # seconds of the music thread's CPU time
+        self.music_wall = 0.0  # seconds it has been running
+        # Messages go to stdout only when nothing is drawing over it yet
+        self.verbose = not background
+        if background:
+            threading.Thread(target=self.init_audio, name="audio-init", daemon=True).start()
+        else:
+            self.init_audio()
+    
+    def report(self, message):
+        self.message = message
+        if self.verbose:
+            print(message)
+    
+    def init_audio(self):
+        """Initialize pygame audio system"""
+        global SOUND_ENABLED, pygame
+        try:
+            if not SOUND_ENABLED:
+                return
+            
+            try:
+                # The import banner would land on top of the menu
+                os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+                import pygame
+            except ImportError:
+                SOUND_ENABLED = False
+                self.report("pygame not found - game will run without sound")
+                return
+            
+            try:
+                pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+                self.create_sound_effects()
+                self.reserve_channels()
+                if SOUND_ENABLED:
+                    threading.Thread(target=self.dispatch, name="audio-dispatch", daemon=True).start()
+                    if self.music_wanted:
+                        sample_rate, _, channels = pygame.mixer.get_init()
+                        self.music = MusicSynth(sample_rate, channels)
+                        self.music_thread = threading.Thread(target=self.stream_music, name="audio-music", daemon=True)
+                        self.music_thread.start()
+            except:
+                SOUND_ENABLED = False
+                self.report("Failed to initialize audio - running without sound")
+        finally:
+            self.status = "on" if SOUND_ENABLED else "off"
+            self.ready_after = time.perf_counter() - STARTUP_CLOCK
+            self.ready.set()
+    
+    def create_sound_effects(self):
+        """Load sound effects from the cache, synthesizing any that are missing"""
+        global SOUND_ENABLED
+        if not SOUND_ENABLED:
+            return
+        
+        try:
+            # The mixer may not grant what init asked for - build for what we got
+            sample_rate, size, channels = pygame.mixer.get_init()
+            cache = SoundCache((sample_rate, size, channels))
+            for name in SOUND_RECIPES:
+                buffer = cache.get(name, sample_rate, channels)
+                setattr(self, f"{name}_sound", pygame.sndarray.make_sound(buffer))
+            
+            self.report("🎵 Audio system initialized successfully!")
+            
+        except Exception as e:
+            SOUND_ENABLED = False
+            self.report(f"Failed to create sound effects: {e} - game will run without sound")
+        
+    def reserve_channels(self):
+        """Give every sound type its own mixer channels, out of reach of Sound.play()"""
+        total = sum(SOUND_CHANNELS.values()) + 1  # the last one is for music
+        pygame.mixer.set_num_channels(max(total, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(total)
+        first = 0
+        for sound_type, count in SOUND_CHANNELS.items():
+            self.channels[sound_type] = [pygame.mixer.Channel(i) for i in range(first, first + count)]
+            first += count
+        self.music_channel = pygame.mixer.Channel(first)
+        for channel in (c for group in self.channels.values() for c in group):
+            self.started[channel] = 0.0
+    
+    def play(self, sound_type):
+        """Queue a sound effect - never blocks the caller"""
+        if not SOUND_ENABLED or not self.ready.is_set():
+            return
+        try:
+            self.commands.put_nowait((sound_type, time.monotonic()))
+        except queue.Full:
+            self.dropped += 1
+    
+    def close(self):
+        """Stop the music and the dispatch thread (after it has drained the queue)"""
+        self.music_stop.set()
+        if self.music_thread is not None:
+            self.music_thread.join(timeout=1.0)  # still in the mixer at interpreter exit can crash
+        try:
+            self.commands.put_nowait(None)
+        except queue.Full:
+            pass
+    
+    def dispatch(self):
+        """Worker: play queued sounds, merging move blips that arrive close together"""
+        while True:
+            batch = [self.commands.get()]
+            while True:
+                try:
+                    batch.append(self.commands.get_nowait())
+                except queue.Empty:
+                    break
+            
+            for command in batch:
+                if command is None:
+                    return
+                sound_type, queued_at = command
+                if sound_type == 'move':
+                    if queued_at - self.last_move < MOVE_COALESCE_WINDOW:
+                        self.coalesced += 1
+                        continue
+                    self.last_move = queued_at
+                self.play_now(sound_type)
+    
+    def stream_music(self):
+        """Worker: keep one music chunk playing and the next one queued behind it"""
+        channel = self.music_channel
+        started = time.perf_counter()
+        cpu = time.thread_time()
+        # Poll several times per chunk, so a chunk that starts playing
+        # has its successor queued long before it ends
+        while not self.music_stop.wait(MUSIC_CHUNK / 4):
+            try:
+                if channel.get_queue() is not None:
+                    continue
+                busy = channel.get_busy()
+                if not busy and self.music.chunks:
+                    self.music_underruns += 1  # ran dry - there was a gap
+                sound = pygame.sndarray.make_sound(self.music.render(self.music_level))
+                if busy:
+                    channel.queue(sound)
+                else:
+                    channel.play(sound)
+            except Exception as e:
+                self.errors += 1
+                self.message = f"Music error: {e}"
+                return
+            finally:
+                self.music_cpu = time.thread_time() - cpu
+                self.music_wall = time.perf_counter() - started
+        channel.fadeout(200)
+    
+    def pick_channel(self, sound_type):
+        """Free channel for sound_type within the voice limit, else the one to take over"""
+        own = self.channels[sound_type]
+        free = [c for c in own if not c.get_busy()]
+        playing = [c for group in self.channels.values() for c in group if c.get_busy()]
+        if free and len(playing) < MAX_VOICES:
+            return free[0]
+        if not free:
+            # Restart the oldest voice of the same type (move just waits its turn)
+            return None if sound_type == 'move' else min(own, key=self.started.get)
+        
+        # At the voice limit: cut the oldest lower-priority sound to make room
+        rank = SOUND_PRIORITY.index(sound_type)
+        lower = [c for t in SOUND_PRIORITY[:rank] for c in self.channels[t] if c.get_busy()]
+        if not lower:
+            return None
+        min(lower, key=self.started.get).stop()
+        return free[0]
+    
+    def play_now(self, sound_type):
+        """Start a sound on its reserved channels (dispatch thread only)"""
+        sound = getattr(self, f"{sound_type}_sound", None)
+        if sound is None:
+            return
+        try:
+            channel = self.pick_channel(sound_type)
+            if channel is None:
+                self.voice_limited += 1
+                return
+            channel.play(sound)
+            self.started[channel] = time.monotonic()
+            self.played += 1
+        except Exception as e:
+            self.errors += 1
+            self.message = f"Audio playback error: {e}"
+            # Fallback to system beep for macOS - fine to block here, we are off the game loop
+            try:
+                import subprocess
+                if sound_type == 'power_up':
+                    subprocess.run(['osascript', '-e', 'beep 2'], check=False)
+                elif sound_type == 'hit':
+                    subprocess.run(['osascript', '-e', 'beep 1'], check=False)
+            except:
+                pass
+    
+    def stats_line(self):
+        """Dispatch counters for --audio-stats"""
+        line = (f"Audio: {self.played} played | {self.coalesced} move blips merged | "
+                f"{self.voice_limited} over voice limit | {self.dropped} dropped (queue full) | "
+                f"{self.errors} errors")
+        if self.music is not None:
+            share = self.music_cpu / self.music_wall if self.music_wall else 0.0
+            line += (f"\nMusic: {self.music.chunks:,} chunks of {MUSIC_CHUNK * 1000:.0f}ms | "
+                     f"{self.music_underruns} underruns | {share:.2%} of one core")
+        return line
+
+class KeyInput:
+    """Keys fed as timestamped events - from a script or a listener thread
+
+    press()/release() only put events on a SimpleQueue, so any thread may
+    call them; poll() runs once per tick on the game loop and replays the
+    events into the held-key set. A key pressed and released between two
+    polls still reads as pressed for that one tick.
+    """
+    def __init__(self):
+        self.events = queue.SimpleQueue()
+        self.pressed_keys = set()  # held as of the last poll
+        self.tapped_keys = set()   # went down since the poll before that
+        self.press_times = []      # perf_counter_ns of each new press in the last poll
+    
+    def start(self):
+        pass
+    
+    def stop(self):
+        pass
+    
+    def press(self, key_name):
+        self.events.put((time.perf_counter_ns(), key_name, True))
+    
+    def release(self, key_name):
+        self.events.put((time.perf_counter_ns(), key_name, False))
+    
+    def poll(self):
+        """Apply every queued event (game loop only, once per tick)"""
+        self.tapped_keys.clear()
+        self.press_times = []
+        while True:
+            try:
+                stamp, key_name, down = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if down:
+                # Auto-repeat sends more presses while held - only the first counts
+                if key_name not in self.pressed_keys:
+                    self.tapped_keys.add(key_name)
+                    self.press_times.append(stamp)
+                self.pressed_keys.add(key_name)
+            else:
+                self.pressed_keys.discard(key_name)
+    
+    def is_pressed(self, key_name):
+        """Check if a key is held, or was tapped since the previous tick"""
+        return key_name in self.pressed_keys or key_name in self.tapped_keys
+
+class KeyboardInput(KeyInput):
+    """Held keys fed by a pynput keyboard listener"""
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+    
+    def start(self):
+        """Start keyboard listener"""
+        if keyboard is None:
+            raise RuntimeError("pynput keyboard input is unavailable (no display?)")
+        self.listener = keyboard.Listener(
+            on_press=self.on_key_press,
+            on_release=self.on_key_release
+        )
+        self.listener.start()
+    
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+    
+    def on_key_press(self, key):
+        """Handle key press events (same as pynput test)"""
+        try:
+            if hasattr(key, 'char') and key.char:
+                self.press(key.char.lower())
+            elif key == keyboard.Key.space:
+                self.press('space')
+            elif key == keyboard.Key.left:
+                self.press('left')
+            elif key == keyboard.Key.right:
+                self.press('right')
+            elif key == keyboard.Key.esc:
+                self.press('esc')
+        except AttributeError:
+            pass
+    
+    def on_key_release(self, key):
+        """Handle key release events (same as pynput test)"""
+        try:
+            if hasattr(key, 'char') and key.char:
+                self.release(key.char.lower())
+            elif key == keyboard.Key.space:
+                self.release('space')
+            elif key == keyboard.Key.left:
+                self.release('left')
+            elif key == keyboard.Key.right:
+                self.release('right')
+            elif key == keyboard.Key.esc:
+                self.release('esc')
+        except AttributeError:
+            pass
+
+class EngineState(NamedTuple):
+    """Summary returned by NeruppuDaaEngine.step()"""
+    frame: int
+    score: int
+    lives: int
+    player_x: int
+    game_over: bool
+    shield_active: bool
+    double_points: bool
+    slow_motion: bool
+    fire_brimstone: int
+    power_ups: int
+
+# Large arenas: the world is split into chunks that each roll spawns like
+# one classic board, so stone density per column matches the normal game
+ARENA_CHUNK_WIDTH = 64
+ARENA_FAR_STEP = 8     # frames between bulk catch-ups of off-screen chunks
+ARENA_KEEP_CHUNKS = 2  # off-screen chunks kept on each side before they are forgotten
+
+class ArenaChunk:
+    """One stretch of arena columns with its own RNG
+
+    While the chunk is near the viewport its stones live in the engine's
+    stores; otherwise they are kept here as (x, y, speed, glyph) arrays.
+    """
+    def __init__(self, seed, index, frame):
+        self.index = index
+        self.rng = random.Random(f"{seed}:{index}:{frame}")
+        self.frame = frame  # simulated up to and including this frame
+        self.fire = None
+        self.power = None
+
+class Arena:
+    """A world wider than the screen, seen through a viewport on the player
+
+    Chunks overlapping the viewport, plus one chunk of margin, are live:
+    their stones sit in the engine stores and get the normal per-frame
+    update, collisions and drawing. Chunks that drift out of that band are
+    caught up in bulk every ARENA_FAR_STEP frames, and anything further
+    than ARENA_KEEP_CHUNKS away is dropped. A chunk that comes back into
+    range is regenerated with enough history that the stones already in
+    flight are in place. Work and memory follow the viewport width, not
+    the world width.
+    """
+    def __init__(self, width, height, view_width, chunk_width=ARENA_CHUNK_WIDTH):
+        self.width = width
+        self.height = height
+        self.view_width = view_width
+        self.chunk_width = chunk_width
+        # Chunks over the spawn columns 1..width-2 - the right border column never gets one
+        self.chunks = -(-(width - 1) // chunk_width)
+        # Frames the slowest entity needs to fall through: a power-up (0.6, stones
+        # start at 0.8), halved by slow motion
+        self.history = int(height / (min(0.8, 0.6) * 0.5)) + 2
+        self.reset(0)
+
+    def reset(self, seed):
+        self.seed = seed
+        # Ring of fall distance per unit of speed, summed from frame 1 up to each frame
+        self.clocks = [0.0] * (self.history + 1)
+        self.live = {}  # index -> ArenaChunk with its stones in the engine stores
+        self.far = {}   # index -> ArenaChunk stepped in bulk
+
+    def clock(self, frame):
+        return self.clocks[frame % len(self.clocks)] if frame > 0 else 0.0
+
+    def view_x(self, player_x):
+        """World column shown at the left edge of the screen"""
+        return max(0, min(player_x - self.view_width // 2, self.width - self.view_width))
+
+    def live_range(self, player_x):
+        """First and last chunk index that is simulated every frame"""
+        left = self.view_x(player_x)
+        first = max(0, (left - self.chunk_width) // self.chunk_width)
+        last = min(self.chunks - 1, (left + self.view_width - 1 + self.chunk_width) // self.chunk_width)
+        return first, last
+
+    def columns(self, index):
+        """Spawn columns of a chunk (the outer world columns are the border)"""
+        start = index * self.chunk_width
+        return max(1, start), min(self.width - 2, start + self.chunk_width - 1)
+
+    def roll_fire(self, chunk, frame):
+        """One chunk's fire roll for a frame, with the odds of spawn_fire_brimstone"""
+        rng = chunk.rng
+        time_factor = min(frame / 300.0, 3.0)
+        if rng.random() < 0.70 + (time_factor * 0.27):
+            x = rng.randint(*self.columns(chunk.index))
+            speed = rng.uniform(0.8 + (time_factor * 0.2), 1.5 + (time_factor * 0.5))
+            return x, speed, rng.randrange(len(FIRE_CHARS))
+        return None
+
+    def roll_power_up(self, chunk):
+        """One chunk's power-up roll for a frame, with the odds of spawn_power_up"""
+        rng = chunk.rng
+        if rng.random() < 0.04:
+            code = rng.randrange(len(POWER_UP_TYPES))
+            return rng.randint(*self.columns(chunk.index)), code
+        return None
+
+    def catch_up(self, chunk, frame):
+        """Bulk-simulate an off-screen chunk through frame"""
+        if frame <= chunk.frame:
+            return
+        end = self.clock(frame)
+        fire = [[], [], [], []]
+        power = [[], [], [], []]
+        for f in range(chunk.frame + 1, frame + 1):
+            fell = end - self.clock(f - 1)  # per unit of speed, for a stone spawned on frame f
+            stone = self.roll_fire(chunk, f)
+            if stone is not None:
+                x, speed, code = stone
+                for column, value in zip(fire, (x, speed * fell, speed, code)):
+                    column.append(value)
+            power_up = self.roll_power_up(chunk)
+            if power_up is not None:
+                x, code = power_up
+                for column, value in zip(power, (x, 0.6 * fell, 0.6, code)):
+                    column.append(value)
+
+        moved = end - self.clock(chunk.frame)
+        chunk.fire = self.merge(chunk.fire, fire, moved)
+        chunk.power = self.merge(chunk.power, power, moved)
+        chunk.frame = frame
+
+    def merge(self, old, new, moved):
+        """Move old stones by moved * speed, append the new ones, drop what fell out"""
+        x, y, speed, glyph = (np.array(column, dtype=dtype) for column, dtype in
+                              zip(new, (np.int64, np.float64, np.float64, np.uint8)))
+        if old is not None:
+            x = np.concatenate([old[0], x])
+            y = np.concatenate([old[1] + old[2] * moved, y])
+            speed = np.concatenate([old[2], speed])
+            glyph = np.concatenate([old[3], glyph])
+        keep = y < self.height
+        return x[keep], y[keep], speed[keep], glyph[keep]
+
+    def take(self, store, index):
+        """Remove a chunk's entities from an engine store and return them as arrays"""
+        n = len(store)
+        start = index * self.chunk_width
+        rows = np.flatnonzero((store.x[:n] >= start) & (store.x[:n] < start + self.chunk_width))
+        columns = (store.x[rows], store.y[rows], store.speed[rows], store.glyph[rows])
+        store.remove_rows(rows)
+        return columns
+
+    def stream(self, engine):
+        """Move chunks between live, far and forgotten as the viewport follows the player"""
+        frame = engine.frame_count
+        self.clocks[frame % len(self.clocks)] = self.clock(frame - 1) + (0.5 if engine.slow_motion else 1.0)
+        first, last = self.live_range(engine.player_pos.x)
+
+        # Chunks leaving the live band take their stones with them
+        for index in [i for i in self.live if not first <= i <= last]:
+            chunk = self.live.pop(index)
+            chunk.fire = self.take(engine.fire_brimstone, index)
+            chunk.power = self.take(engine.power_ups, index)
+            chunk.frame = frame - 1
+            self.far[index] = chunk
+
+        # Chunks entering it are brought up to last frame and handed to the engine
+        for index in range(first, last + 1):
+            if index in self.live:
+                continue
+            chunk = self.far.pop(index, None)
+            if chunk is None:
+                chunk = ArenaChunk(self.seed, index, max(0, frame - self.history))
+            self.catch_up(chunk, frame - 1)
+            if chunk.fire is not None:
+                engine.fire_brimstone.spawn_many(*chunk.fire)
+                engine.power_ups.spawn_many(*chunk.power)
+            chunk.fire = chunk.power = None
+            self.live[index] = chunk
+
+        # Off-screen chunks: forget the distant ones, step the rest now and then
+        for index in list(self.far):
+            if not first - ARENA_KEEP_CHUNKS <= index <= last + ARENA_KEEP_CHUNKS:
+                del self.far[index]
+            elif frame - self.far[index].frame >= ARENA_FAR_STEP:
+                self.catch_up(self.far[index], frame)
+
+    def spawn_fire_brimstone(self, engine):
+        """Per-frame fire rolls for every live chunk"""
+        self.stream(engine)
+        store = engine.fire_brimstone
+        for index in sorted(self.live):
+            stone = self.roll_fire(self.live[index], engine.frame_count)
+            if stone is not None:
+                x, speed, code = stone
+                store.spawn(x, 0, speed, FIRE_CHARS[code])
+
+    def spawn_power_up(self, engine):
+        """Per-frame power-up rolls for every live chunk"""
+        store = engine.power_ups
+        for index in sorted(self.live):
+            power_up = self.roll_power_up(self.live[index])
+            if power_up is not None:
+                x, code = power_up
+                store.spawn(x, 0, 0.6, store.glyphs[code])
+
+# Spawns are drawn ahead of time, a block of frames per NumPy call
+SPAWN_BLOCK = 1024
+SPAWN_BLOCKS_KEPT = 2  # a look-ahead across a block boundary needs both
+
+class SpawnSchedule:
+    """Every fire stone and power-up a game will spawn, by frame
+
+    Blocks of SPAWN_BLOCK frames are generated with array calls from
+    np.random.default_rng((seed, block number)), so any frame can be
+    looked up without replaying the ones before it, and engines cloned
+    from one another can share a schedule. The odds follow the same
+    difficulty curve the per-frame rolls used.
+    """
+    def __init__(self, seed, width, block=SPAWN_BLOCK):
+        self.seed = seed
+        self.width = width
+        self.block = block
+        self.blocks = {}  # block number -> roll() arrays
+
+    def roll(self, number):
+        """One block as arrays: fire?, x, speed, glyph code, power-up?, x, code"""
+        n = self.block
+        rng = np.random.default_rng((self.seed, number))
+        frames = np.arange(number * n, (number + 1) * n)
+        
+        # Progressive difficulty - more fire & brimstone and faster as time goes on
+        time_factor = np.minimum(frames / 300.0, 3.0)  # Increases over 30 seconds, caps at 3x
+        
+        # Spawn rate increases with time (starts at 70%, up to 97%)
+        fire = rng.random(n) < 0.70 + (time_factor * 0.27)
+        fire_x = rng.integers(1, self.width - 1, size=n, dtype=np.int32)
+        # Speed increases with time (starts 0.8-1.5, up to 1.5-3.0)
+        speed = rng.uniform(0.8 + (time_factor * 0.2), 1.5 + (time_factor * 0.5))
+        fire_glyph = rng.integers(0, len(FIRE_CHARS), size=n, dtype=np.uint8)
+        
+        power = rng.random(n) < 0.04  # 4% chance
+        power_x = rng.integers(1, self.width - 1, size=n, dtype=np.int32)
+        power_glyph = rng.integers(0, len(POWER_UP_TYPES), size=n, dtype=np.uint8)
+        return fire, fire_x, speed, fire_glyph, power, power_x, power_glyph
+
+    def generate(self, number):
+        """Roll one block and keep its arrays, dropping the kept block furthest from it"""
+        if len(self.blocks) >= SPAWN_BLOCKS_KEPT:
+            del self.blocks[max(self.blocks, key=lambda kept: abs(kept - number))]
+        block = self.blocks[number] = self.roll(number)
+        return block
+
+    def lookup(self, frame):
+        """(block arrays, row) holding a frame"""
+        number, i = divmod(frame, self.block)
+        block = self.blocks.get(number)
+        if block is None:
+            block = self.generate(number)
+        return block, i
+
+    def stone(self, frame):
+        """(x, speed, char) of the fire stone spawned on a frame, or None"""
+        block, i = self.lookup(frame)
+        if not block[0][i]:
+            return None
+        return int(block[1][i]), float(block[2][i]), FIRE_CHARS[block[3][i]]
+
+    def power_up(self, frame):
+        """(x, char) of the power-up spawned on a frame, or None"""
+        block, i = self.lookup(frame)
+        if not block[4][i]:
+            return None
+        return int(block[5][i]), POWER_UP_CHARS[block[6][i]]
+
+class NeruppuDaaEngine:
+    """Headless game rules: spawning, movement, collisions and scoring
+
+    No keyboard listener, mixer or sleeping. Spawns come from a
+    SpawnSchedule seeded by start_game, so a given seed and action sequence
+    always replays the same game. Sounds go to an optional audio adapter with a play(sound_type)
+    method (see PygameAudio).
+
+    One engine steps about 40-60k frames/s: a frame is a few dozen NumPy
+    calls on arrays of a few dozen rows, so per-call overhead dominates.
+    Bulk simulation such as balance runs belongs on batch_sim.BatchedEngine,
+    which steps thousands of games per array call (about 300k game-frames/s).
+    """
+    def __init__(self, width=60, height=20, seed=None, audio=None, view_width=None):
+        self.width = width
+        self.height = height
+        # A world wider than the view scrolls, and only the part near it is simulated
+        self.arena = Arena(width, height, view_width) if view_width and view_width < width else None
+        self.rng = random.Random(seed)
+        self.spawns = SpawnSchedule(self.rng.getrandbits(63), width)
+        self.audio = audio
+        self.player_pos = Position(self.width // 2, self.height - 2)
+        self.fire_brimstone = EntityStore(FIRE_CHARS, make_fire_brimstone)
+        self.power_ups = EntityStore(POWER_UP_TYPES, make_power_up)
+        self.score = 0
+        self.lives = 1
+        self.game_state = GameState.MENU
+        self.frame_count = 0
+        
+        # Power-up effects
+        self.double_points = False
+        self.double_points_timer = 0
+        self.shield_active = False
+        self.slow_motion = False
+        self.slow_motion_timer = 0
+    
+    def play_sound(self, sound_type):
+        """Forward a sound effect to the audio adapter, if any"""
+        if self.audio is not None:
+            self.audio.play(sound_type)
+    
+    def spawn_fire_brimstone(self):
+        """Spawn new fire & brimstone continuously with increasing difficulty"""
+        if self.arena is not None:
+            self.arena.spawn_fire_brimstone(self)
+            return
+        
+        # Difficulty grows with frame_count (see SpawnSchedule)
+        stone = self.spawns.stone(self.frame_count)
+        if stone is not None:
+            x, speed, char = stone
+            self.fire_brimstone.spawn(x, 0, speed, char)
+    
+    def spawn_power_up(self):
+        """Spawn power-ups occasionally"""
+        if self.arena is not None:
+            self.arena.spawn_power_up(self)
+            return
+        
+        power_up = self.spawns.power_up(self.frame_count)
+        if power_up is not None:
+            x, char = power_up
+            self.power_ups.spawn(x, 0, 0.6, char)
+    
+    def update_fire_brimstone(self):
+        """Update fire & brimstone positions every frame"""
+        speed_multiplier = 0.5 if self.slow_motion else 1.0
+        
+        self.fire_brimstone.advance(speed_multiplier)
+        self.fire_brimstone.cull(self.height)
+    
+    def update_power_ups(self):
+        """Update power-up positions"""
+        speed_multiplier = 0.5 if self.slow_motion else 1.0
+        self.power_ups.advance(speed_multiplier)
+        self.power_ups.cull(self.height)
+    
+    def check_collisions(self):
+        """Check for collisions"""
+        # Check fire & brimstone collisions (only the first stone hit counts)
+        hits = self.fire_brimstone.hits(self.player_pos.x, self.player_pos.y)
+        if len(hits):
+            if self.shield_active:
+                self.shield_active = False
+            else:
+                self.lives -= 1
+                if self.lives <= 0:
+                    self.game_state = GameState.GAME_OVER
+                    self.play_sound('gameover')
+            
+            # Play hit sound effect
+            self.play_sound('hit')
+            self.fire_brimstone.remove_rows(hits[:1])
+            return
+        
+        # Check power-up collisions
+        hits = self.power_ups.hits(self.player_pos.x, self.player_pos.y)
+        if len(hits):
+            for row in hits:
+                self.collect_power_up(self.power_ups[row])
+            self.power_ups.remove_rows(hits)
+    
+    def collect_power_up(self, power_up: PowerUp):
+        """Apply power-up effects"""
+        # Play power-up sound effect
+        self.play_sound('power_up')
+        
+        if power_up.type == 'double_points':
+            self.double_points = True
+            self.double_points_timer = 180
+        elif power_up.type == 'extra_life':
+            # In hardcore mode, extra life gives temporary shield instead
+            self.shield_active = True
+        elif power_up.type == 'slow_motion':
+            self.slow_motion = True
+            self.slow_motion_timer = 120
+        elif power_up.type == 'shield':
+            self.shield_active = True
+        
+        points = 50
+        self.score += points
+    
+    def update_power_up_timers(self):
+        """Update power-up effect timers"""
+        if self.double_points_timer > 0:
+            self.double_points_timer -= 1
+        else:
+            self.double_points = False
+            
+        if self.slow_motion_timer > 0:
+            self.slow_motion_timer -= 1
+        else:
+            self.slow_motion = False
+    
+    def move_player(self, inputs):
+        """Apply INPUT_LEFT/INPUT_RIGHT bits the way held keys move the player"""
+        if self.game_state != GameState.PLAYING:
+            return
+        
+        old_x = self.player_pos.x
+        if inputs & INPUT_LEFT and self.player_pos.x > 1:
+            self.player_pos.x -= 2
+        
+        if inputs & INPUT_RIGHT and self.player_pos.x < self.width - 2:
+            self.player_pos.x += 2
+        
+        # Play movement sound if player moved
+        if old_x != self.player_pos.x:
+            self.play_sound('move')
+    
+    def difficulty_level(self):
+        """Level 1-16, from the same time factor that drives the spawns"""
+        return int(min(self.frame_count / 300.0, 3.0) * 5) + 1
+    
+    def start_game(self, seed=None):
+        """Start new game (on the given seed, or the next one from self.rng)"""
+        if seed is None:
+            seed = self.rng.getrandbits(63)
+        self.rng.seed(seed)
+        if seed != self.spawns.seed:
+            self.spawns = SpawnSchedule(seed, self.width)
+        self.game_state = GameState.PLAYING
+        self.reset_game()
+    
+    def reset_game(self):
+        """Reset game state"""
+        self.player_pos = Position(self.width // 2, self.height - 2)
+        self.fire_brimstone.clear()
+        self.power_ups.clear()
+        self.score = 0
+        self.lives = 1
+        self.frame_count = 0
+        self.double_points = False
+        self.double_points_timer = 0
+        self.shield_active = False
+        self.slow_motion = False
+        self.slow_motion_timer = 0
+        if self.arena is not None:
+            self.arena.reset(self.rng.getrandbits(64))
+    
+    def update_game(self):
+        """Advance the simulation by one frame"""
+        if self.game_state != GameState.PLAYING:
+            return
+        
+        self.frame_count += 1
+        
+        # Spawn elements every frame
+        self.spawn_fire_brimstone()
+        self.spawn_power_up()
+        
+        # Update positions every frame
+        self.update_fire_brimstone()
+        self.update_power_ups()
+        
+        # Check collisions
+        self.check_collisions()
+        
+        # Update timers
+        self.update_power_up_timers()
+        
+        # Score for survival
+        points = 3 if self.double_points else 2
+        self.score += points
+    
+    def step(self, action=ACTION_STAY):
+        """Apply one frame of input, advance one frame and report the result"""
+        self.move_player(action)
+        self.update_game()
+        return EngineState(
+            self.frame_count, self.score, self.lives, self.player_pos.x,
+            self.game_state == GameState.GAME_OVER, self.shield_active,
+            self.double_points, self.slow_motion,
+            len(self.fire_brimstone), len(self.power_ups)
+        )
+    
+    def clone(self):
+        """Independent engine in the same state, RNG included (no audio; not for arenas)
+
+        The spawn schedule never changes once drawn, so the twin shares it.
+        """
+        if self.arena is not None:
+            raise ValueError("arena games cannot be cloned")
+        twin = NeruppuDaaEngine.__new__(NeruppuDaaEngine)
+        twin.width = self.width
+        twin.height = self.height
+        twin.arena = None
+        twin.rng = random.Random.__new__(random.Random)
+        twin.rng.setstate(self.rng.getstate())
+        twin.spawns = self.spawns
+        twin.audio = None
+        twin.player_pos = Position(self.player_pos.x, self.player_pos.y)
+        twin.fire_brimstone = self.fire_brimstone.copy()
+        twin.power_ups = self.power_ups.copy()
+        twin.score = self.score
+        twin.lives = self.lives
+        twin.game_state = self.game_state
+        twin.frame_count = self.frame_count
+        twin.double_points = self.double_points
+        twin.double_points_timer = self.double_points_timer
+        twin.shield_active = self.shield_active
+        twin.slow_motion = self.slow_motion
+        twin.slow_motion_timer = self.slow_motion_timer
+        return twin
+    
+    def snapshot(self):
+        """Everything update_game depends on, packed as bytes (see restore)"""
+        stores = (self.fire_brimstone, self.power_ups)
+        parts = [SNAPSHOT_HEAD.pack(
+            self.frame_count, self.score, self.lives, self.player_pos.x,
+            self.double_points, self.double_points_timer, self.shield_active,
+            self.slow_motion, self.slow_motion_timer, *(len(store) for store in stores),
+            self.spawns.seed,
+        )]
+        for store in stores:
+            n = len(store)
+            parts += [store.x[:n].astype(np.int32).tobytes(), store.y[:n].tobytes(),
+                      store.speed[:n].tobytes(), store.glyph[:n].tobytes()]
+        return b''.join(parts)
+    
+    def restore(self, data):
+        """Return to the exact state a snapshot() was taken in"""
+        (self.frame_count, self.score, self.lives, self.player_pos.x,
+         double_points, self.double_points_timer, shield_active,
+         slow_motion, self.slow_motion_timer, n_fire, n_power, seed) = SNAPSHOT_HEAD.unpack_from(data)
+        self.double_points = bool(double_points)
+        self.shield_active = bool(shield_active)
+        self.slow_motion = bool(slow_motion)
+        self.player_pos.y = self.height - 2
+        self.game_state = GameState.PLAYING if self.lives > 0 else GameState.GAME_OVER
+        
+        if seed != self.spawns.seed:
+            self.spawns = SpawnSchedule(seed, self.width)
+        
+        offset = SNAPSHOT_HEAD.size
+        for store, n in ((self.fire_brimstone, n_fire), (self.power_ups, n_power)):
+            columns = []
+            for dtype in (np.int32, np.float64, np.float64, np.uint8):
+                columns.append(np.frombuffer(data, dtype=dtype, count=n, offset=offset))
+                offset += columns[-1].nbytes
+            store.clear()
+            store.spawn_many(*columns)
+
+# Replay files: header, one input byte per tick, then snapshots for seeking
+REPLAY_MAGIC = b'NDRP'
+REPLAY_VERSION = 2  # 2: spawns from SpawnSchedule, snapshots carry its seed
+REPLAY_HEAD = struct.Struct('<4sBHHQIqI')  # magic, version, width, height, seed, ticks, score, snapshot count
+REPLAY_INDEX = struct.Struct('<IQ')        # frame, byte offset of the snapshot
+SNAPSHOT_HEAD = struct.Struct('<IqhhBIBBIIIQ')
+SNAPSHOT_EVERY = 500                       # ticks between snapshots (50 s of play)
+
+class ReplayRecorder:
+    """Collects one game's inputs and periodic snapshots, then writes them out
+
+    The game calls record(inputs) after every update_game; the byte is the
+    INPUT_LEFT/INPUT_RIGHT mask that move_player applied that tick.
+    """
+    def __init__(self, engine, seed, snapshot_every=SNAPSHOT_EVERY):
+        if engine.arena is not None:
+            raise ValueError("arena games cannot be recorded (chunk state is not in snapshots)")
+        self.engine = engine
+        self.seed = seed
+        self.snapshot_every = snapshot_every
+        self.inputs = bytearray()
+        self.snapshots = []  # (frame, bytes)
+    
+    def record(self, inputs):
+        self.inputs.append(inputs)
+        if len(self.inputs) % self.snapshot_every == 0:
+            self.snapshots.append((len(self.inputs), self.engine.snapshot()))
+    
+    def write(self, path):
+        engine = self.engine
+        with open(path, 'wb') as f:
+            f.write(REPLAY_HEAD.pack(REPLAY_MAGIC, REPLAY_VERSION, engine.width, engine.height,
+                                     self.seed, len(self.inputs), engine.score, len(self.snapshots)))
+            f.write(self.inputs)
+            offset = REPLAY_HEAD.size + len(self.inputs) + REPLAY_INDEX.size * len(self.snapshots)
+            for frame, data in self.snapshots:
+                f.write(REPLAY_INDEX.pack(frame, offset))
+                offset += len(data)
+            for _, data in self.snapshots:
+                f.write(data)
+
+class Replay:
+    """A recorded game, loaded for headless playback and seeking"""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        (magic, version, self.width, self.height, self.seed, self.ticks,
+         self.score, count) = REPLAY_HEAD.unpack_from(self.data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} NERUPPU DAA replay")
+        start = REPLAY_HEAD.size
+        self.inputs = self.data[start:start + self.ticks]
+        index = start + self.ticks
+        entries = [REPLAY_INDEX.unpack_from(self.data, index + i * REPLAY_INDEX.size) for i in range(count)]
+        self.snapshot_frames = [frame for frame, _ in entries]
+        ends = [offset for _, offset in entries[1:]] + [len(self.data)]
+        self.snapshot_data = [memoryview(self.data)[offset:end] for (_, offset), end in zip(entries, ends)]
+    
+    def engine_at(self, frame):
+        """Headless engine exactly as it was after `frame` ticks
+        
+        Starts from the closest snapshot at or before the frame, so the
+        cost is at most SNAPSHOT_EVERY update_game calls.
+        """
+        frame = max(0, min(frame, self.ticks))
+        engine = NeruppuDaaEngine(width=self.width, height=self.height)
+        engine.start_game(self.seed)
+        i = bisect.bisect_right(self.snapshot_frames, frame) - 1
+        if i >= 0:
+            engine.restore(self.snapshot_data[i])
+        for inputs in self.inputs[engine.frame_count:frame]:
+            engine.move_player(inputs)
+            engine.update_game()
+        return engine
+    
+    def play(self):
+        """Rebuild the whole game, fast and silent"""
+        return self.engine_at(self.ticks)
+
+# Autopilot look-ahead search
+AUTOPILOT_BUDGET = 0.02    # seconds of search per tick (a tick is 0.1 s)
+AUTOPILOT_MAX_DEPTH = 40   # frames looked ahead
+AUTOPILOT_BEAM = 48        # diverged paths kept per frame of look-ahead
+AUTOPILOT_ACTIONS = (ACTION_STAY, ACTION_LEFT, ACTION_RIGHT)  # tie-break order
+ATTRACT_PAUSE_TICKS = 30   # menu / game-over time between autopilot games
+OFF_BOARD = -10            # where a Timeline parks its player
+
+class Timeline:
+    """A world stepped frame by frame with its player parked off the board
+
+    Every path through the look-ahead that has changed the world in the
+    same way shares one timeline; the paths themselves are only columns
+    checked against its frames.
+    """
+    __slots__ = ('worlds', 'start', 'signature')
+
+    def __init__(self, world, signature=None):
+        world.player_pos.x = OFF_BOARD
+        self.worlds = [world]
+        self.start = world.frame_count
+        self.signature = signature
+
+    def at(self, frame):
+        """The world at frame, stepped on first use"""
+        worlds = self.worlds
+        while len(worlds) <= frame - self.start:
+            world = worlds[-1].clone()
+            world.update_game()
+            worlds.append(world)
+        return worlds[frame - self.start]
+
+    def trim(self, frame):
+        """Forget the frames before frame"""
+        if frame > self.start:
+            del self.worlds[:frame - self.start]
+            self.start = frame
+
+class SearchNode:
+    """A player column and shield some frames ahead, on one timeline
+
+    One node stands for every move sequence that reaches the same state.
+    """
+    __slots__ = ('x', 'shield', 'timeline', 'score', 'parents', 'mask')
+
+    def __init__(self, x, shield, timeline, score):
+        self.x = x
+        self.shield = shield
+        self.timeline = timeline
+        self.score = score
+        self.parents = []  # (node, action) edges from the frame before
+        self.mask = 0      # bit per root action that can lead here
+
+class Autopilot:
+    """Plays by searching the game's future: stay, left or right each tick
+
+    It clones the engine RNG and all, so it sees the stones that are about
+    to spawn; its scores are an upper bound on what a person could manage,
+    which is what a reference player for balance testing should be.
+
+    The world is stepped once per frame of look-ahead with the player
+    parked off the board (a Timeline), and a move sequence is just a column
+    checked against those frames. Only a sequence that would change the
+    world (a shield soaking a stone, a power-up collected) pays for an
+    engine clone - copy on write - and the world it leaves behind starts a
+    new timeline, shared by every sequence that changed it the same way.
+    Equal states are merged. The search goes one frame deeper at a time and
+    stops when the budget is spent, even mid-frame; after a move the part of
+    the tree under it, half-built frame included, is grown further on the
+    next tick. Cutting away the rest of the tree is paid from the budget
+    too, a frame at a time.
+    """
+    def __init__(self, budget=AUTOPILOT_BUDGET, max_depth=AUTOPILOT_MAX_DEPTH, beam=AUTOPILOT_BEAM):
+        self.budget = budget
+        self.max_depth = max_depth
+        self.beam = beam
+        self.layers = []    # layers[k]: nodes still alive k frames ahead
+        self.partial = None # (children by key, parents left) of the frame being built
+        self.timelines = {} # signature -> Timeline, so equal divergences share one
+        self.frame = 0      # frame_count at the root
+        self.width = 0
+        self.expected = None  # (frame, x, shield, score) the next root should have
+        self.rooted = 0       # layers[:rooted] are pruned for the current root, the rest not yet
+        self.live = None      # timelines under the new root, gathered while pruning after a move
+
+        # Accounting
+        self.searches = 0
+        self.nodes = 0
+        self.forks = 0
+        self.reused = 0
+        self.restarts = 0
+        self.search_ns = 0
+        self.depth_total = 0
+
+    def choose(self, engine):
+        """Best action for the engine's next frame (ACTION_STAY/LEFT/RIGHT)"""
+        start = time.perf_counter_ns()
+        deadline = start + int(self.budget * 1e9)
+        if not self.resume(engine):
+            self.restart(engine)
+        while self.prune(deadline) and len(self.layers) <= self.max_depth and self.layers[-1]:
+            if not self.expand(deadline):
+                break
+        action = self.best_action()
+        self.depth_total += self.rooted
+        self.advance(action)
+        self.searches += 1
+        self.search_ns += time.perf_counter_ns() - start
+        return action
+
+    def resume(self, engine):
+        """True if the engine is in the state the kept tree was built for"""
+        player = engine.player_pos
+        return (self.layers and self.expected ==
+                (engine.frame_count, player.x, engine.shield_active, engine.score))
+
+    def restart(self, engine):
+        timeline = Timeline(engine.clone())
+        self.timelines = {}
+        self.layers = [[SearchNode(engine.player_pos.x, engine.shield_active, timeline, engine.score)]]
+        self.partial = None
+        self.rooted = 1
+        self.live = None
+        self.frame = engine.frame_count
+        self.width = engine.width
+        self.restarts += 1
+
+    def moved(self, x, action):
+        """Column after action, with move_player's edge rules"""
+        if action & INPUT_LEFT and x > 1:
+            x -= 2
+        if action & INPUT_RIGHT and x < self.width - 2:
+            x += 2
+        return x
+
+    def fork(self, node, action, frame):
+        """Play one frame of a diverging path on a clone - (timeline, x, shield) after it, or None if it dies"""
+        world = node.timeline.at(frame).clone()
+        world.player_pos.x = node.x
+        world.shield_active = node.shield
+        world.move_player(action)
+        world.update_game()
+        self.forks += 1
+        if world.game_state != GameState.PLAYING:
+            return None
+        x, shield = world.player_pos.x, world.shield_active
+        fire, power = world.fire_brimstone, world.power_ups
+        signature = (world.frame_count, world.score, world.double_points_timer, world.slow_motion_timer,
+                     fire.ids[:len(fire)].tobytes(), power.ids[:len(power)].tobytes())
+        timeline = self.timelines.get(signature)
+        if timeline is None:
+            timeline = self.timelines[signature] = Timeline(world, signature)
+        return timeline, x, shield
+
+    def expand(self, deadline):
+        """Grow the tree by one frame; False if the deadline came first (it resumes next time)"""
+        if self.partial is None:
+            self.partial = ({}, list(self.layers[-1]))
+        children, parents = self.partial
+        frame = self.frame + len(self.layers) - 1
+        while parents:
+            if time.perf_counter_ns() >= deadline:
+                return False
+            node = parents.pop()
+            world = node.timeline.at(frame + 1)
+            y = world.player_pos.y
+            for action in AUTOPILOT_ACTIONS:
+                self.nodes += 1
+                x = self.moved(node.x, action)
+                stones = len(world.fire_brimstone.hits(x, y))
+                power_ups = len(world.power_ups.hits(x, y))
+                if not stones and not power_ups:
+                    timeline, shield = node.timeline, node.shield
+                elif stones and not node.shield:
+                    continue  # dead
+                else:
+                    forked = self.fork(node, action, frame)
+                    if forked is None:
+                        continue
+                    timeline, x, shield = forked
+                key = (timeline, x, shield)
+                child = children.get(key)
+                if child is None:
+                    child = children[key] = SearchNode(x, shield, timeline, timeline.at(frame + 1).score)
+                child.parents.append((node, action))
+
+        self.partial = None
+        layer = list(children.values())
+        if len(layer) > self.beam:
+            # Keep the best scores; the main timeline's columns are always kept
+            main = self.layers[0][0].timeline
+            layer.sort(key=lambda node: (node.timeline is main, node.score), reverse=True)
+            layer = layer[:max(self.beam, sum(node.timeline is main for node in layer))]
+        for node in layer:
+            for parent, action in node.parents:
+                node.mask |= (1 << action) if frame == self.frame else parent.mask
+        self.layers.append(layer)
+        self.rooted += 1
+        return True
+
+    def best_action(self):
+        """Root action leading deepest, then to the best score, then to the most options"""
+        for layer in reversed(self.layers[1:self.rooted]):
+            if not layer:
+                continue
+            ranked = []
+            for action in AUTOPILOT_ACTIONS:
+                reach = [node.score for node in layer if node.mask & (1 << action)]
+                if reach:
+                    ranked.append((max(reach), len(reach), -AUTOPILOT_ACTIONS.index(action), action))
+            return max(ranked)[-1]
+        return ACTION_STAY  # every path ends next frame
+
+    def advance(self, action):
+        """Move the root to the child the action leads to; prune() drops what it can't reach"""
+        root = self.layers[0][0]
+        child = None
+        if self.rooted > 1:
+            child = next((node for node in self.layers[1]
+                          if any(parent is root and move == action for parent, move in node.parents)), None)
+        if child is None:
+            self.layers = []
+            self.partial = None
+            self.expected = None
+            return
+
+        child.parents = []
+        child.mask = 0
+        self.layers = [[child]] + self.layers[2:]
+        self.rooted = 1
+        self.live = {child.timeline}
+        self.frame += 1
+        self.expected = (self.frame, child.x, child.shield, child.score)
+
+    def prune(self, deadline):
+        """Drop the nodes the last move left unreachable, a frame at a time
+
+        False if the deadline came first; the next call carries on. The
+        first frame under the root is always pruned, so there is a move to
+        pick.
+        """
+        layers = self.layers
+        root = layers[0][0]
+        while self.rooted < len(layers):
+            if self.rooted > 1 and time.perf_counter_ns() >= deadline:
+                return False
+            above = set(layers[self.rooted - 1])
+            kept = []
+            for node in layers[self.rooted]:
+                parents = [(parent, move) for parent, move in node.parents if parent in above]
+                if parents:
+                    node.parents = parents
+                    node.mask = 0
+                    for parent, move in parents:
+                        node.mask |= (1 << move) if parent is root else parent.mask
+                    kept.append(node)
+            layers[self.rooted] = kept
+            self.rooted += 1
+            self.reused += len(kept)
+            self.live.update(node.timeline for node in kept)
+            if not kept:
+                del layers[self.rooted:]
+                self.partial = None
+
+        if self.live is None:
+            return True
+        # The half-built frame keeps what still hangs off the new tree
+        if self.partial is not None:
+            children, parents = self.partial
+            above = set(layers[-1])
+            kept = {}
+            for key, node in children.items():
+                node.parents = [(parent, move) for parent, move in node.parents if parent in above]
+                if node.parents:
+                    kept[key] = node
+            self.partial = (kept, [parent for parent in parents if parent in above])
+            self.live.update(node.timeline for node in kept.values())
+
+        # Drop the frames and timelines nothing can reach any more
+        for timeline in self.live:
+            timeline.trim(self.frame)
+        self.timelines = {timeline.signature: timeline for timeline in self.live
+                          if timeline.signature is not None}
+        self.live = None
+        return True
+
+    def stats_line(self):
+        """Search speed and depth"""
+        seconds = self.search_ns / 1e9
+        searches = self.searches or 1
+        return (f"Autopilot: {self.searches:,} moves | {self.nodes:,} nodes "
+                f"({self.nodes / seconds if seconds else 0:,.0f}/s) | "
+                f"avg {self.search_ns / searches / 1e6:.1f}ms and {self.depth_total / searches:.1f} frames deep | "
+                f"{self.forks:,} forks | reused {self.reused:,} nodes | restarts {self.restarts:,}")
+
+TICK_RATE = 10  # simulation ticks per second - difficulty and survival time assume this
+
+class FixedTimestep:
+    """Fixed simulation tick and a separate render rate on a monotonic clock
+
+    Ticks are scheduled at absolute times (start + n * tick), so time spent
+    rendering or sleeping never accumulates as drift. When the loop falls
+    behind, due_ticks() returns several ticks to catch up, up to
+    max_catch_up; any older backlog is dropped rather than replayed.
+    """
+    def __init__(self, tick_rate=TICK_RATE, render_rate=None, max_catch_up=5, clock=time.monotonic):
+        self.clock = clock
+        self.tick_interval = 1.0 / tick_rate
+        self.render_interval = 1.0 / (render_rate or tick_rate)
+        # Interpolate only when frames are drawn between ticks
+        self.interpolate = render_rate is not None and render_rate > tick_rate
+        self.max_catch_up = max_catch_up
+        self.reset()
+
+    def reset(self):
+        """Restart the schedule from now (and clear the counters)"""
+        now = self.clock()
+        self.next_tick = now
+        self.next_render = now
+        self.ticks = 0
+        self.renders = 0
+        self.missed_deadlines = 0
+        self.dropped_ticks = 0
+        self.lateness_total = 0.0
+        self.lateness_max = 0.0
+
+    def due_ticks(self, now):
+        """Number of simulation ticks to run at time now"""
+        count = 0
+        while now >= self.next_tick and count < self.max_catch_up:
+            lateness = now - self.next_tick
+            self.lateness_total += lateness
+            self.lateness_max = max(self.lateness_max, lateness)
+            if lateness >= self.tick_interval:
+                self.missed_deadlines += 1
+            self.next_tick += self.tick_interval
+            count += 1
+        if now >= self.next_tick:
+            # Too far behind to catch up - skip the backlog
+            skipped = int((now - self.next_tick) / self.tick_interval) + 1
+            self.dropped_ticks += skipped
+            self.next_tick += skipped * self.tick_interval
+        self.ticks += count
+        return count
+
+    def render_due(self, now):
+        """True (and schedule the next frame) when a frame should be drawn"""
+        if now < self.next_render:
+            return False
+        self.next_render += self.render_interval
+        if self.next_render <= now:
+            self.next_render = now + self.render_interval
+        self.renders += 1
+        return True
+
+    def alpha(self, now):
+        """How far (0-1) we are from the last tick towards the next one"""
+        if not self.interpolate:
+            return 1.0
+        remaining = (self.next_tick - now) / self.tick_interval
+        return min(1.0, max(0.0, 1.0 - remaining))
+
+    def wait(self, rendering=True):
+        """Sleep until the next tick (or frame, while frames are being drawn) is due"""
+        due = min(self.next_tick, self.next_render) if rendering else self.next_tick
+        delay = due - self.clock()
+        if delay > 0:
+            time.sleep(delay)
+
+    def stats_line(self):
+        """Summary of scheduling health"""
+        avg_late = self.lateness_total / self.ticks * 1000 if self.ticks else 0.0
+        return (f"Ticks: {self.ticks:,} | Frames drawn: {self.renders:,} | "
+                f"Missed deadlines: {self.missed_deadlines:,} | Dropped ticks: {self.dropped_ticks:,} | "
+                f"Avg lateness: {avg_late:.1f}ms | Max: {self.lateness_max * 1000:.1f}ms")
+
+class TimingHistogram:
+    """Log-bucketed nanosecond timings (8 buckets per power of two)"""
+    def __init__(self):
+        self.counts = [0] * 512
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        if ns < 16:
+            bucket = ns
+        else:
+            shift = ns.bit_length() - 4
+            bucket = (shift << 3) + (ns >> shift)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    @staticmethod
+    def _bucket_mid(bucket):
+        if bucket < 16:
+            return float(bucket)
+        shift = (bucket >> 3) - 1
+        mantissa = (bucket & 7) + 8
+        return (mantissa + 0.5) * (1 << shift)
+
+    def percentile(self, pct):
+        """Approximate pct-th percentile in nanoseconds"""
+        if not self.count:
+            return 0.0
+        target = pct / 100.0 * self.count
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return min(self._bucket_mid(bucket), float(self.max))
+        return float(self.max)
+
+    def summary(self):
+        """Microsecond statistics for the JSON report"""
+        us = lambda ns: round(ns / 1000.0, 3)
+        return {
+            'count': self.count,
+            'mean_us': us(self.total / self.count) if self.count else 0.0,
+            'p50_us': us(self.percentile(50)),
+            'p95_us': us(self.percentile(95)),
+            'p99_us': us(self.percentile(99)),
+            'max_us': us(self.max),
+        }
+
+class TimedStream:
+    """Wrap an output stream and time how long writes block"""
+    def __init__(self, stream, histogram):
+        self.stream = stream
+        self.histogram = histogram
+
+    def write(self, data):
+        start = time.perf_counter_ns()
+        result = self.stream.write(data)
+        self.stream.flush()
+        self.histogram.add(time.perf_counter_ns() - start)
+        return result
+
+    def flush(self):
+        self.stream.flush()
+
+class FrameProfiler:
+    """Per-phase frame timings and entity counts for the hot path
+
+    attach() swaps the phase methods on one game instance for timed
+    wrappers, so nothing is measured (or paid for) until profiling starts.
+    """
+    PHASES = ('handle_input', 'spawn_fire_brimstone', 'spawn_power_up',
+              'update_fire_brimstone', 'update_power_ups', 'check_collisions',
+              'update_power_up_timers', 'draw_game')
+    HUD_PHASES = (('handle_input', 'input'), ('spawn_fire_brimstone', 'spawn'),
+                  ('update_fire_brimstone', 'update'), ('check_collisions', 'coll'),
+                  ('update_power_up_timers', 'timers'), ('draw_game', 'draw'),
+                  ('stdout_write', 'write'))
+
+    def __init__(self):
+        self.phases = {}
+        self.fire_brimstone = TimingHistogram()  # entity counts share the bucketing
+        self.power_ups = TimingHistogram()
+        self.started = time.time()
+
+    def histogram(self, name):
+        if name not in self.phases:
+            self.phases[name] = TimingHistogram()
+        return self.phases[name]
+
+    def attach(self, game):
+        """Start timing the phases of game"""
+        for name in self.PHASES:
+            self._wrap(game, name, self.histogram(name))
+
+        # Whole tick, plus entity counts once it is done
+        update_game = game.update_game
+        tick = self.histogram('update_game')
+        clock = time.perf_counter_ns
+        def timed_update_game():
+            start = clock()
+            update_game()
+            tick.add(clock() - start)
+            self.fire_brimstone.add(len(game.fire_brimstone))
+            self.power_ups.add(len(game.power_ups))
+        game.update_game = timed_update_game
+
+        # Time spent blocked on the terminal, separate from composing the frame
+        game.renderer.out = TimedStream(game.renderer.out, self.histogram('stdout_write'))
+
+    @staticmethod
+    def _wrap(obj, name, histogram):
+        method = getattr(obj, name)
+        clock = time.perf_counter_ns
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.add(clock() - start)
+        setattr(obj, name, timed)
+
+    def hud_line(self):
+        """One-line p95 overlay for the game screen"""
+        parts = []
+        for name, label in self.HUD_PHASES:
+            hist = self.phases.get(name)
+            if hist is not None and hist.count:
+                parts.append(f"{label} {hist.percentile(95) / 1e6:.2f}")
+        return f"p95 ms: {' | '.join(parts)} | stones {int(self.fire_brimstone.percentile(95))}"
+
+    def report(self):
+        """Everything measured so far, as JSON-ready data"""
+        return {
+            'started': self.started,
+            'duration_s': round(time.time() - self.started, 3),
+            'phases': {name: hist.summary() for name, hist in self.phases.items()},
+            'entities': {
+                'fire_brimstone': {'mean': round(self.fire_brimstone.total / max(1, self.fire_brimstone.count), 2),
+                                   'p95': self.fire_brimstone.percentile(95),
+                                   'max': self.fire_brimstone.max},
+                'power_ups': {'mean': round(self.power_ups.total / max(1, self.power_ups.count), 2),
+                              'p95': self.power_ups.percentile(95),
+                              'max': self.power_ups.max},
+            },
+        }
+
+    def write_report(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+class Leaderboard:
+    """Every finished run, kept in SQLite so scores survive restarts
+
+    The database runs in WAL mode, so any number of game processes on one
+    host can read the board while others write. submit() only queues the
+    run; a writer thread inserts queued runs in batches, one transaction
+    each. Top-N and per-player-best reads are served by indexes.
+    """
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS runs ("
+        " id INTEGER PRIMARY KEY, player TEXT NOT NULL, score INTEGER NOT NULL,"
+        " frames INTEGER NOT NULL, level INTEGER NOT NULL, played_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC, played_at)",
+        "CREATE INDEX IF NOT EXISTS runs_by_player ON runs (player, score DESC)",
+    )
+    INSERT = "INSERT INTO runs (player, score, frames, level, played_at) VALUES (?, ?, ?, ?, ?)"
+    
+    def __init__(self, path, batch_size=64, flush_interval=0.25):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = self.connect()
+        with self.db:
+            for statement in self.SCHEMA:
+                self.db.execute(statement)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.written = self.errors = 0
+        self.writer = threading.Thread(target=self.write_batches, name="leaderboard-writer", daemon=True)
+        self.writer.start()
+    
+    def connect(self):
+        import sqlite3
+        db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commit is at risk on power loss
+        return db
+    
+    def submit(self, player, score, frames, level):
+        """Queue a finished run (returns immediately)"""
+        self.pending.put((player, score, frames, level, time.time()))
+    
+    def write_batches(self):
+        """Writer: insert queued runs, waiting up to flush_interval to fill a batch"""
+        import sqlite3
+        db = self.connect()
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            rows = [run for run in batch if run is not None]
+            if rows:
+                try:
+                    with db:
+                        db.executemany(self.INSERT, rows)
+                    self.written += len(rows)
+                except sqlite3.Error:
+                    self.errors += len(rows)
+            if batch[-1] is None:
+                db.close()
+                return
+    
+    def top(self, n=10):
+        """Best n runs as (player, score, frames, level, played_at)"""
+        return self.db.execute(
+            "SELECT player, score, frames, level, played_at FROM runs"
+            " ORDER BY score DESC, played_at LIMIT ?", (n,)).fetchall()
+    
+    def best(self, player=None):
+        """Highest score overall, or for one player (0 if none yet)"""
+        if player is None:
+            row = self.db.execute("SELECT score FROM runs ORDER BY score DESC LIMIT 1").fetchone()
+        else:
+            row = self.db.execute("SELECT MAX(score) FROM runs WHERE player = ?", (player,)).fetchone()
+        return (row[0] or 0) if row else 0
+    
+    def close(self):
+        """Write whatever is still queued, then close"""
+        self.pending.put(None)
+        self.writer.join()
+        self.db.close()
+
+def default_leaderboard_path():
+    base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'neruppu_daa', 'leaderboard.db')
+
+class NeruppuDaaGame(NeruppuDaaEngine):
+    def __init__(self, render_mode='full', headless=False, seed=None, fps=None, width=60, height=20,
+                 record_dir=None, view_width=None, leaderboard=None, player='player', autopilot=None,
+                 music=True):
+        # headless: no keyboard listener and no mixer - drive self.input from code
+        # Audio comes up on a background thread; the menu does not wait for it
+        super().__init__(width=width, height=height, seed=seed,
+                         audio=None if headless else PygameAudio(background=True, music=music),
+                         view_width=view_width)
+        # Columns on screen - the whole board unless this is a scrolling arena
+        self.view_width = self.arena.view_width if self.arena is not None else self.width
+        self.blank_field = ([FIELD_BORDER] + [' '] * (self.view_width - 2) + [FIELD_BORDER]) * self.height
+        # Scores persist in the leaderboard when there is one
+        self.leaderboard = leaderboard
+        self.player = player
+        self.high_score = leaderboard.best() if leaderboard is not None else 0
+        self.new_high_score = False
+        self.first_frame_after = None  # seconds from STARTUP_CLOCK to the first drawn screen
         
-        # Initialize audio system
-        self.init_audio()
+        # Every game gets its own seed so it can be replayed on its own
+        self.game_seeds = random.Random(seed)
+        self.record_dir = record_dir
+        self.recorder = None
+        self.tick_inputs = 0  # what move_player applied this tick, for the replay
+        self.last_replay = None
         
-        # Power-up effects
-        self.double_points = False
-        self.double_points_timer = 0
-        self.shield_active = False
-        self.slow_motion = False
-        self.slow_motion_timer = 0
+        # Attract mode: an Autopilot plays every game, starting the next one by itself
+        self.autopilot = autopilot
+        self.attract_ticks = 0
         
         # Game control
         self.running = True
         
-        # Key handling (same as pynput test)
-        self.pressed_keys = set()
-        self.last_action_time = {}
+        # Terminal output ('full' repaints every frame, 'diff' only changed cells)
+        # Interactive play writes on a pump thread and skips frames the terminal can't keep up with
+        self.renderer = TerminalRenderer(diff=(render_mode == 'diff'), threaded=not headless)
         
-        # Start keyboard listener
-        self.listener = keyboard.Listener(
-            on_press=self.on_key_press,
-            on_release=self.on_key_release
-        )
-        self.listener.start()
-    
-    def init_audio(self):
-        """Initialize pygame audio system"""
-        global SOUND_ENABLED
-        if not SOUND_ENABLED:
-            return
+        # Fixed 10 Hz simulation, frames drawn at fps (default: once per tick)
+        self.scheduler = FixedTimestep(render_rate=fps)
         
-        try:
-            pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
-            self.create_sound_effects()
-        except:
-            SOUND_ENABLED = False
-            print("Failed to initialize audio - running without sound")
-    
-    def create_sound_effects(self):
-        """Create simple sound effects using pygame"""
-        global SOUND_ENABLED
-        if not SOUND_ENABLED:
-            return
+        # Frame-time profiling (P toggles the overlay, --profile writes JSON)
+        self.profiler = None
+        self.show_profile_hud = False
         
-        try:
-            import numpy as np
-            
-            # Power-up sound (bright ascending arpeggio)
-            duration = 0.4
-            sample_rate = 22050
-            t = np.linspace(0, duration, int(sample_rate * duration), False)
-            
-            # Create an ascending arpeggio with sparkle effect
-            freq1 = 523  # C5
-            freq2 = 659  # E5  
-            freq3 = 784  # G5
-            freq4 = 1047 # C6
-            
-            # Create ascending notes with different timing
-            note1 = np.sin(freq1 * 2 * np.pi * t) * 0.3 * np.exp(-8*t)
-            note2 = np.sin(freq2 * 2 * np.pi * t) * 0.3 * np.exp(-6*(t-0.1)) * (t > 0.1)
-            note3 = np.sin(freq3 * 2 * np.pi * t) * 0.3 * np.exp(-4*(t-0.2)) * (t > 0.2)
-            note4 = np.sin(freq4 * 2 * np.pi * t) * 0.2 * np.exp(-2*(t-0.3)) * (t > 0.3)
-            
-            power_up_wave = note1 + note2 + note3 + note4
-            power_up_wave = (power_up_wave * 32767).astype(np.int16)
-            stereo_wave = np.column_stack([power_up_wave, power_up_wave])
-            stereo_wave = np.ascontiguousarray(stereo_wave)
-            self.power_up_sound = pygame.sndarray.make_sound(stereo_wave)
-            
-            # Hit sound (harsh low tone with decay)
-            hit_wave = np.sin(150 * 2 * np.pi * t) * 0.6 * np.exp(-2*t)
-            hit_wave = (hit_wave * 32767).astype(np.int16)  
-            stereo_hit = np.column_stack([hit_wave, hit_wave])
-            stereo_hit = np.ascontiguousarray(stereo_hit)
-            self.hit_sound = pygame.sndarray.make_sound(stereo_hit)
-            
-            
-            # Movement sound (quick blip)
-            move_duration = 0.1
-            move_t = np.linspace(0, move_duration, int(sample_rate * move_duration), False)
-            move_wave = np.sin(800 * 2 * np.pi * move_t) * 0.2 * np.exp(-5*move_t)
-            move_wave = (move_wave * 32767).astype(np.int16)
-            stereo_move = np.column_stack([move_wave, move_wave])
-            stereo_move = np.ascontiguousarray(stereo_move)
-            self.move_sound = pygame.sndarray.make_sound(stereo_move)
-            
-            # Game over sound (epic failure chord progression)
-            gameover_duration = 1.2
-            gameover_t = np.linspace(0, gameover_duration, int(sample_rate * gameover_duration), False)
-            
-            # Create a dramatic minor chord progression that descends
-            # First chord (Am) - dark and ominous
-            chord1_freq = [220, 261, 329]  # A3, C4, E4
-            # Second chord (Dm) - even darker  
-            chord2_freq = [146, 174, 220]  # D3, F3, A3
-            # Final chord (low rumble)
-            final_freq = [87, 110]  # F2, A2
-            
-            # Build the progression
-            chord1 = sum(np.sin(f * 2 * np.pi * gameover_t) * 0.3 * np.exp(-3*gameover_t) * (gameover_t < 0.4) for f in chord1_freq)
-            chord2 = sum(np.sin(f * 2 * np.pi * gameover_t) * 0.4 * np.exp(-2*(gameover_t-0.4)) * ((gameover_t >= 0.4) & (gameover_t < 0.8)) for f in chord2_freq)  
-            final = sum(np.sin(f * 2 * np.pi * gameover_t) * 0.5 * np.exp(-1*(gameover_t-0.8)) * (gameover_t >= 0.8) for f in final_freq)
-            
-            gameover_wave = chord1 + chord2 + final
-            gameover_wave = (gameover_wave * 32767).astype(np.int16)
-            stereo_gameover = np.column_stack([gameover_wave, gameover_wave])
-            stereo_gameover = np.ascontiguousarray(stereo_gameover)
-            self.gameover_sound = pygame.sndarray.make_sound(stereo_gameover)
-            
-            print("🎵 Audio system initialized successfully!")
-            
-        except Exception as e:
-            SOUND_ENABLED = False
-            print(f"Failed to create sound effects: {e}")
-            print("Game will run without sound")
+        # Key handling (same as pynput test)
+        self.input = KeyInput() if headless else KeyboardInput()
+        self.last_action_time = {}
+        self.action_clock = time.time  # debounce clock - scripted runs may swap in simulated time
         
-    def play_sound(self, sound_type):
-        """Play sound effect"""
-        if not SOUND_ENABLED:
-            return
-            
-        try:
-            if sound_type == 'power_up' and hasattr(self, 'power_up_sound'):
-                self.power_up_sound.play()
-                print("🎵 Power-up sound!")
-            elif sound_type == 'hit' and hasattr(self, 'hit_sound'):
-                self.hit_sound.play()
-                print("💥 Hit sound!")
-            elif sound_type == 'move' and hasattr(self, 'move_sound'):
-                self.move_sound.play()
-            elif sound_type == 'gameover' and hasattr(self, 'gameover_sound'):
-                self.gameover_sound.play()
-                print("💀 Game over sound!")
-                
-        except Exception as e:
-            print(f"Audio playback error: {e}")
-            # Fallback to system beep for macOS
-            try:
-                import subprocess
-                if sound_type == 'power_up':
-                    subprocess.run(['osascript', '-e', 'beep 2'], check=False)
-                elif sound_type == 'hit':
-                    subprocess.run(['osascript', '-e', 'beep 1'], check=False)
-            except:
-                pass
-    
-    def on_key_press(self, key):
-        """Handle key press events (same as pynput test)"""
-        try:
-            if hasattr(key, 'char') and key.char:
-                self.pressed_keys.add(key.char.lower())
-            elif key == keyboard.Key.space:
-                self.pressed_keys.add('space')
-            elif key == keyboard.Key.left:
-                self.pressed_keys.add('left')
-            elif key == keyboard.Key.right:
-                self.pressed_keys.add('right')
-            elif key == keyboard.Key.esc:
-                self.pressed_keys.add('esc')
-        except AttributeError:
-            pass
-    
-    def on_key_release(self, key):
-        """Handle key release events (same as pynput test)"""
-        try:
-            if hasattr(key, 'char') and key.char:
-                self.pressed_keys.discard(key.char.lower())
-            elif key == keyboard.Key.space:
-                self.pressed_keys.discard('space')
-            elif key == keyboard.Key.left:
-                self.pressed_keys.discard('left')
-            elif key == keyboard.Key.right:
-                self.pressed_keys.discard('right')
-            elif key == keyboard.Key.esc:
-                self.pressed_keys.discard('esc')
-        except AttributeError:
-            pass
+        # Input-to-frame latency of presses made during play
+        self.pending_presses = []
+        self.input_latency = TimingHistogram()
+        
+        # Start keyboard listener
+        self.input.start()
     
     def is_pressed(self, key_name):
-        """Check if a key is currently pressed (same as pynput test)"""
-        return key_name in self.pressed_keys
+        """Check if a key is currently pressed"""
+        return self.input.is_pressed(key_name)
+    
+    def enable_profiler(self):
+        """Start per-phase timing (idempotent)"""
+        if self.profiler is None:
+            self.profiler = FrameProfiler()
+            self.profiler.attach(self)
+        return self.profiler
     
     def should_process_action(self, action):
         """Debounce action keys (same as pynput test)"""
-        current_time = time.time()
+        current_time = self.action_clock()
         if action in self.last_action_time:
             if current_time - self.last_action_time[action] < 0.3:
                 return False
@@ -269,143 +2634,30 @@ class NeruppuDaaGame:
         """Show terminal cursor"""
         print('\033[?25h', end='')
     
-    def spawn_fire_brimstone(self):
-        """Spawn new fire & brimstone continuously with increasing difficulty"""
-        # Progressive difficulty - more fire & brimstone and faster as time goes on
-        time_factor = min(self.frame_count / 300.0, 3.0)  # Increases over 30 seconds, caps at 3x
-        
-        # Spawn rate increases with time (starts at 70%, up to 97%)
-        spawn_rate = 0.70 + (time_factor * 0.27)
-        
-        if random.random() < spawn_rate:
-            # Fire and brimstone symbols
-            fire_chars = ['o', 'O', '^', 'v', 'x', '%', '&', '~']
-            
-            # Speed increases with time (starts 0.8-1.5, up to 1.5-3.0)
-            base_speed_min = 0.8 + (time_factor * 0.2)
-            base_speed_max = 1.5 + (time_factor * 0.5)
-            
-            drop = FireBrimstone(
-                pos=Position(random.randint(1, self.width - 2), 0),
-                speed=random.uniform(base_speed_min, base_speed_max),
-                char=random.choice(fire_chars)
-            )
-            self.fire_brimstone.append(drop)
-    
-    def spawn_power_up(self):
-        """Spawn power-ups occasionally"""
-        if random.random() < 0.04:  # 4% chance
-            power_types = {
-                '*': 'double_points',
-                '+': 'extra_life', 
-                '!': 'slow_motion',
-                '#': 'shield'
-            }
-            char = random.choice(list(power_types.keys()))
-            power_up = PowerUp(
-                pos=Position(random.randint(1, self.width - 2), 0),
-                type=power_types[char],
-                char=char
-            )
-            self.power_ups.append(power_up)
-    
-    def update_fire_brimstone(self):
-        """Update fire & brimstone positions every frame"""
-        speed_multiplier = 0.5 if self.slow_motion else 1.0
-        
-        for drop in self.fire_brimstone[:]:
-            drop.pos.y += drop.speed * speed_multiplier
-            if drop.pos.y >= self.height:
-                self.fire_brimstone.remove(drop)
-    
-    def update_power_ups(self):
-        """Update power-up positions"""
-        speed_multiplier = 0.5 if self.slow_motion else 1.0
-        for power_up in self.power_ups[:]:
-            power_up.pos.y += 0.6 * speed_multiplier
-            if power_up.pos.y >= self.height:
-                self.power_ups.remove(power_up)
-    
-    def check_collisions(self):
-        """Check for collisions"""
-        # Check fire & brimstone collisions
-        for drop in self.fire_brimstone[:]:
-            if (abs(drop.pos.x - self.player_pos.x) <= 1 and 
-                abs(drop.pos.y - self.player_pos.y) <= 1):
-                
-                if self.shield_active:
-                    self.shield_active = False
-                else:
-                    self.lives -= 1
-                    if self.lives <= 0:
-                        self.game_state = GameState.GAME_OVER
-                        self.play_sound('gameover')
-                
-                # Play hit sound effect
-                self.play_sound('hit')
-                self.fire_brimstone.remove(drop)
-                return
-        
-        # Check power-up collisions
-        for power_up in self.power_ups[:]:
-            if (abs(power_up.pos.x - self.player_pos.x) <= 1 and 
-                abs(power_up.pos.y - self.player_pos.y) <= 1):
-                
-                self.collect_power_up(power_up)
-                self.power_ups.remove(power_up)
-    
-    def collect_power_up(self, power_up: PowerUp):
-        """Apply power-up effects"""
-        # Play power-up sound effect
-        self.play_sound('power_up')
-        
-        if power_up.type == 'double_points':
-            self.double_points = True
-            self.double_points_timer = 180
-        elif power_up.type == 'extra_life':
-            # In hardcore mode, extra life gives temporary shield instead
-            self.shield_active = True
-        elif power_up.type == 'slow_motion':
-            self.slow_motion = True
-            self.slow_motion_timer = 120
-        elif power_up.type == 'shield':
-            self.shield_active = True
-        
-        points = 50
-        self.score += points
-    
-    def update_power_up_timers(self):
-        """Update power-up effect timers"""
-        if self.double_points_timer > 0:
-            self.double_points_timer -= 1
-        else:
-            self.double_points = False
-            
-        if self.slow_motion_timer > 0:
-            self.slow_motion_timer -= 1
-        else:
-            self.slow_motion = False
-    
     def handle_input(self):
         """Handle keyboard input using pynput (same patterns as test)"""
-        # Movement keys (can be held)
-        old_x = self.player_pos.x
-        if self.is_pressed('a') or self.is_pressed('left'):
-            if self.game_state == GameState.PLAYING and self.player_pos.x > 1:
-                self.player_pos.x -= 2
-        
-        if self.is_pressed('d') or self.is_pressed('right'):
-            if self.game_state == GameState.PLAYING and self.player_pos.x < self.width - 2:
-                self.player_pos.x += 2
+        self.input.poll()
+        if self.game_state == GameState.PLAYING:
+            self.pending_presses += self.input.press_times
+        else:
+            self.pending_presses.clear()  # nothing to show them on until play resumes
         
-        # Play movement sound if player moved
-        if self.game_state == GameState.PLAYING and old_x != self.player_pos.x:
-            self.play_sound('move')
+        # Movement keys (can be held)
+        inputs = 0
+        if self.autopilot is not None:
+            inputs = self.autopilot_inputs()
+        else:
+            if self.is_pressed('a') or self.is_pressed('left'):
+                inputs |= INPUT_LEFT
+            if self.is_pressed('d') or self.is_pressed('right'):
+                inputs |= INPUT_RIGHT
+        self.tick_inputs = inputs if self.game_state == GameState.PLAYING else 0
+        self.move_player(inputs)
         
         # Action keys with debouncing (same as pynput test)
         if self.is_pressed('space'):
             if self.game_state == GameState.MENU and self.should_process_action('space'):
-                self.start_game()
+                self.new_game()
         
         if self.is_pressed('q'):
             if self.should_process_action('quit'):
@@ -419,38 +2671,75 @@ class NeruppuDaaGame:
             if self.should_process_action('quit'):
                 self.running = False
         
-    
-    def draw_game(self):
-        """Draw the game screen"""
-        self.clear_screen()
-        
-        # Create clean game field
-        field = [[' ' for x in range(self.width)] for y in range(self.height)]
+        if self.is_pressed('p'):
+            if self.should_process_action('profile'):
+                self.enable_profiler()
+                self.show_profile_hud = not self.show_profile_hud
         
-        # Draw fire & brimstone
-        for drop in self.fire_brimstone:
-            y, x = int(drop.pos.y), drop.pos.x
-            if 0 <= y < self.height and 0 <= x < self.width:
-                field[y][x] = drop.char
+    def new_game(self):
+        """Start a game on the next seed, recording it if asked to"""
+        seed = self.game_seeds.getrandbits(63)
+        self.start_game(seed)
+        if self.record_dir is not None:
+            self.recorder = ReplayRecorder(self, seed)
+    
+    def autopilot_inputs(self):
+        """The autopilot's move this tick; between games it restarts after a pause"""
+        if self.game_state == GameState.PLAYING:
+            self.attract_ticks = 0
+            return self.autopilot.choose(self)
+        self.attract_ticks += 1
+        if self.attract_ticks >= ATTRACT_PAUSE_TICKS:
+            self.attract_ticks = 0
+            if self.game_state == GameState.MENU:
+                self.new_game()
+            else:
+                self.reset_to_menu()
+        return 0
+    
+    
+    def draw_game(self, alpha=1.0):
+        """Draw the game screen
+
+        alpha < 1 draws falling entities part way between their previous
+        and current tick positions (used when rendering faster than ticks).
+        """
+        self.present(*self.frame_rows(alpha))
+    
+    def frame_rows(self, alpha=1.0):
+        """Compose the game screen as renderer rows, with the glyph styles to draw them in"""
+        # Create clean game field (only the columns on screen)
+        view_width = self.view_width
+        view_x = self.arena.view_x(self.player_pos.x) if self.arena is not None else 0
+        # Flat row-major cells, borders already in place
+        field = self.blank_field.copy()
+        lag = (1.0 - alpha) * (0.5 if self.slow_motion else 1.0)
         
-        # Draw power-ups
-        for power_up in self.power_ups:
-            y, x = int(power_up.pos.y), power_up.pos.x
-            if 0 <= y < self.height and 0 <= x < self.width:
-                field[y][x] = power_up.char
+        # Draw fire & brimstone, then power-ups on top
+        for store in (self.fire_brimstone, self.power_ups):
+            n = len(store)
+            glyphs = store.glyphs
+            ys = store.y[:n] - store.speed[:n] * lag if lag else store.y[:n]
+            xs = store.x[:n] - view_x if view_x else store.x[:n]
+            for x, y, code in zip(xs.tolist(), ys.astype(np.int64).tolist(),
+                                  store.glyph[:n].tolist()):
+                if 0 <= y < self.height and 0 <= x < view_width:
+                    field[y * view_width + x] = glyphs[code]
         
         # Draw player
-        if 0 <= self.player_pos.y < self.height and 0 <= self.player_pos.x < self.width:
-            field[self.player_pos.y][self.player_pos.x] = '@'
+        player_x = self.player_pos.x - view_x
+        if 0 <= self.player_pos.y < self.height and 0 <= player_x < view_width:
+            field[self.player_pos.y * view_width + player_x] = '@'
+        
+        rows = []
         
-        # Print header
-        print(f"{Colors.BOLD}{Colors.RED}🔥  NERUPPU DAA - HARDCORE MODE 🔥{Colors.RESET}")
+        # Header
+        rows.append(f"{Colors.BOLD}{Colors.RED}🔥  NERUPPU DAA - HARDCORE MODE 🔥{Colors.RESET}".encode())
         
-        # Calculate difficulty level
-        time_factor = min(self.frame_count / 300.0, 3.0)
-        difficulty_level = int(time_factor * 5) + 1  # Level 1-16
+        difficulty_level = self.difficulty_level()
         
-        print(f"{Colors.YELLOW}Score: {self.score:,} | High: {self.high_score:,} | Life: {Colors.RED}{'♥' * self.lives}{Colors.RESET} | Level: {Colors.CYAN}{difficulty_level}{Colors.RESET}")
+        position = f" | X: {self.player_pos.x}/{self.width}" if self.arena is not None else ""
+        rows.append(f"{Colors.YELLOW}Score: {self.score:,} | High: {self.high_score:,} | Life: {Colors.RED}{'♥' * self.lives}{Colors.RESET} | Level: {Colors.CYAN}{difficulty_level}{Colors.RESET}{Colors.YELLOW}{position}{Colors.RESET}".encode())
         
         # Active effects
         effects = []
@@ -462,36 +2751,56 @@ class NeruppuDaaGame:
             effects.append(f"{Colors.BLUE}SLOW{Colors.RESET}")
         
         effect_line = f"Effects: {' | '.join(effects)}" if effects else ""
-        print(effect_line.ljust(60))
+        rows.append(effect_line.ljust(60).encode())
         
-        print(f"{Colors.CYAN}┌{'─' * (self.width - 2)}┐{Colors.RESET}")
+        rows.append(f"{Colors.CYAN}┌{'─' * (view_width - 2)}┐{Colors.RESET}".encode())
         
-        # Game field
-        for y in range(self.height):
-            line = f"{Colors.CYAN}│{Colors.RESET}"
-            for x in range(1, self.width - 1):
-                char = field[y][x]
-                
-                if char == '@':
-                    color = Colors.BLUE + Colors.BOLD if self.shield_active else Colors.GREEN + Colors.BOLD
-                    line += f"{color}{char}{Colors.RESET}"
-                elif char in ['o', 'O', '^', 'v', 'x', '%', '&', '~']:
-                    # All fire and brimstone in red
-                    line += f"{Colors.RED + Colors.BOLD}{char}{Colors.RESET}"
-                elif char in ['*', '+', '!', '#']:
-                    line += f"{Colors.BLUE}{Colors.BOLD}{char}{Colors.RESET}"
-                else:
-                    line += char
-            line += f"{Colors.CYAN}│{Colors.RESET}"
-            print(line)
+        # Game field - glyph strings, styled by the renderer's glyph table
+        cells = ''.join(field)
+        rows.extend(cells[start:start + view_width] for start in range(0, len(cells), view_width))
+        
+        rows.append(f"{Colors.CYAN}└{'─' * (view_width - 2)}┘{Colors.RESET}".encode())
+        rows.append(f"{Colors.YELLOW}A/D or ←/→ to Move | Q=Quit{Colors.RESET}".encode())
+        if self.show_profile_hud:
+            rows.append(f"{Colors.GRAY}{self.profiler.hud_line()}{Colors.RESET}".encode())
+        
+        return rows, SHIELDED_GLYPH_STYLES if self.shield_active else GLYPH_STYLES
+    
+    def present(self, rows, styles):
+        """Send a composed frame to the terminal"""
+        sent = self.renderer.render(rows, styles)
         
-        print(f"{Colors.CYAN}└{'─' * (self.width - 2)}┘{Colors.RESET}")
-        print(f"{Colors.YELLOW}A/D or ←/→ to Move | Q=Quit{Colors.RESET}")
+        # The frame is out: every press applied since the last one is now visible
+        if sent and self.pending_presses:
+            shown = time.perf_counter_ns()
+            for pressed in self.pending_presses:
+                self.input_latency.add(shown - pressed)
+            self.pending_presses.clear()
+    
+    def latency_stats_line(self):
+        """Input-to-frame latency percentiles"""
+        hist = self.input_latency
+        ms = lambda ns: ns / 1e6
+        return (f"Input latency: {hist.count:,} presses | p50 {ms(hist.percentile(50)):.1f}ms | "
+                f"p95 {ms(hist.percentile(95)):.1f}ms | p99 {ms(hist.percentile(99)):.1f}ms | "
+                f"max {ms(hist.max):.1f}ms")
     
     def draw_menu(self):
         """Draw main menu"""
+        self.renderer.invalidate()
         self.clear_screen()
-        print(f"""
+        print(self.menu_text())
+    
+    def menu_text(self):
+        """Main menu screen as text"""
+        board = ""
+        if self.leaderboard is not None:
+            board = f"\n{Colors.GREEN}{Colors.BOLD}                      ═══ TOP 10 ═══{Colors.RESET}\n"
+            for rank, (player, score, frames, level, _) in enumerate(self.leaderboard.top(10), 1):
+                mark = Colors.YELLOW if player == self.player else Colors.WHITE
+                board += (f"{mark}                      {rank:>2}. {player[:14]:<14} {score:>8,}"
+                          f"  L{level:<2} {frames // 10:>4}s{Colors.RESET}\n")
+        return f"""
 {Colors.BOLD}{Colors.CYAN}
     ███╗   ██╗███████╗██████╗ ██╗   ██╗██████╗ ██████╗ ██╗   ██╗    ██████╗  █████╗  █████╗ 
     ████╗  ██║██╔════╝██╔══██╗██║   ██║██╔══██╗██╔══██╗██║   ██║    ██╔══██╗██╔══██╗██╔══██╗
@@ -505,7 +2814,7 @@ class NeruppuDaaGame:
 
 {Colors.YELLOW}                     🔥  SURVIVE THE FIRE STONES!  🔥{Colors.RESET}
 {Colors.WHITE}                           High Score: {Colors.BOLD}{self.high_score:,}{Colors.RESET}
-
+{board}
 {Colors.GREEN}{Colors.BOLD}                      ═══ HOW TO PLAY ═══{Colors.RESET}
                       {Colors.WHITE}• Use A/D or ←/→ keys to move your player (@){Colors.RESET}
                       {Colors.RED}• HARDCORE MODE: One hit = Game Over!{Colors.RESET}
@@ -520,17 +2829,19 @@ class NeruppuDaaGame:
 
 {Colors.BOLD}{Colors.YELLOW}                      PRESS SPACE TO START!{Colors.RESET}
 {Colors.YELLOW}                        Press Q to Quit{Colors.RESET}
-        """)
+        """
     
     def draw_game_over(self):
         """Draw game over screen"""
+        self.renderer.invalidate()
         self.clear_screen()
+        print(self.game_over_text())
+    
+    def game_over_text(self):
+        """Game over screen as text"""
+        new_high = self.new_high_score
         
-        new_high = self.score > self.high_score
-        if new_high:
-            self.high_score = self.score
-        
-        print(f"""
+        lines = [f"""
 {Colors.RED}{Colors.BOLD}
     ██████╗  █████╗ ███╗   ███╗███████╗     ██████╗ ██╗   ██╗███████╗██████╗ 
     ██╔════╝ ██╔══██╗████╗ ████║██╔════╝    ██╔═══██╗██║   ██║██╔════╝██╔══██╗
@@ -541,69 +2852,79 @@ class NeruppuDaaGame:
 {Colors.RESET}
 
 {Colors.YELLOW}                            Final Score: {Colors.BOLD}{self.score:,}{Colors.RESET}
-""")
+"""]
         
         if new_high:
-            print(f"{Colors.BOLD}{Colors.YELLOW}                        🎉 NEW HIGH SCORE! 🎉{Colors.RESET}")
+            lines.append(f"{Colors.BOLD}{Colors.YELLOW}                        🎉 NEW HIGH SCORE! 🎉{Colors.RESET}")
         else:
-            print(f"{Colors.WHITE}                        High Score: {Colors.BOLD}{self.high_score:,}{Colors.RESET}")
+            lines.append(f"{Colors.WHITE}                        High Score: {Colors.BOLD}{self.high_score:,}{Colors.RESET}")
+        if self.leaderboard is not None and self.autopilot is None:
+            lines.append(f"{Colors.WHITE}                        {self.player}'s best: {Colors.BOLD}{self.player_best:,}{Colors.RESET}")
         
         survival_time = max(1, self.frame_count // 10)
-        print(f"""
+        lines.append(f"""
 {Colors.WHITE}                        You survived for{Colors.RESET}
 {Colors.CYAN}                            {survival_time} seconds!{Colors.RESET}
 
 {Colors.BOLD}{Colors.GREEN}                        R - Play Again{Colors.RESET}
 {Colors.YELLOW}                        Q - Quit Game{Colors.RESET}
         """)
+        return '\n'.join(lines)
+    
+    def finish_run(self):
+        """Book a finished game: high score, and the leaderboard if there is one"""
+        self.new_high_score = self.score > self.high_score
+        if self.new_high_score:
+            self.high_score = self.score
+        if self.leaderboard is not None and self.autopilot is None:
+            self.leaderboard.submit(self.player, self.score, self.frame_count, self.difficulty_level())
+            # The write is still queued, so fold this run in by hand
+            self.player_best = max(self.leaderboard.best(self.player), self.score)
+    
+    def save_replay(self):
+        """Write the game being recorded to record_dir"""
+        os.makedirs(self.record_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.record_dir, f"neruppu-{stamp}-{self.recorder.seed:016x}.ndr")
+        self.recorder.write(path)
+        self.recorder = None
+        self.last_replay = path
     
     def reset_to_menu(self):
         """Reset to menu state"""
         self.game_state = GameState.MENU
     
-    def start_game(self):
-        """Start new game"""
-        self.game_state = GameState.PLAYING
-        self.reset_game()
-    
-    def reset_game(self):
-        """Reset game state"""
-        self.player_pos = Position(self.width // 2, self.height - 2)
-        self.fire_brimstone.clear()
-        self.power_ups.clear()
-        self.score = 0
-        self.lives = 1
-        self.frame_count = 0
-        self.double_points = False
-        self.double_points_timer = 0
-        self.shield_active = False
-        self.slow_motion = False
-        self.slow_motion_timer = 0
+    def startup_stats_line(self):
+        """Time to first frame and to usable sound, both from module import"""
+        if self.first_frame_after is None:
+            line = "Startup: no frame drawn"
+        else:
+            line = f"Startup: first frame {self.first_frame_after * 1000:.1f} ms"
+        if self.audio is not None:
+            if self.audio.ready_after is not None:
+                line += f" | audio ready {self.audio.ready_after * 1000:.1f} ms ({self.audio.status})"
+            else:
+                line += " | audio still loading"
+        return line
     
-    def update_game(self):
-        """Update game state every frame"""
-        if self.game_state != GameState.PLAYING:
-            return
-        
-        self.frame_count += 1
-        
-        # Spawn elements every frame
-        self.spawn_fire_brimstone()
-        self.spawn_power_up()
-        
-        # Update positions every frame
-        self.update_fire_brimstone()
-        self.update_power_ups()
-        
-        # Check collisions
-        self.check_collisions()
+    def tick(self):
+        """One simulation tick: input, then the update and everything that follows a game's end"""
+        # Handle input every tick (using proven pynput methods)
+        self.handle_input()
         
-        # Update timers
-        self.update_power_up_timers()
+        if self.game_state == GameState.PLAYING:
+            # CRITICAL: Continuous gameplay - fire & brimstone falls every tick
+            self.update_game()
+            if self.recorder is not None:
+                self.recorder.record(self.tick_inputs)
+                if self.game_state != GameState.PLAYING:
+                    self.save_replay()
+            if self.game_state == GameState.GAME_OVER:
+                self.finish_run()
         
-        # Score for survival
-        points = 3 if self.double_points else 2
-        self.score += points
+        # Music speeds up with the difficulty and calms down off the game
+        if self.audio is not None:
+            self.audio.music_level = self.difficulty_level() if self.game_state == GameState.PLAYING else 0
     
     def run(self):
         """Main game loop"""
@@ -613,23 +2934,27 @@ class NeruppuDaaGame:
             menu_shown = False
             game_over_shown = False
             
-            print(f"{Colors.YELLOW}Starting NERUPPU DAA with pynput library!{Colors.RESET}")
-            time.sleep(0.5)
-            
+            scheduler = self.scheduler
+            scheduler.reset()
             while self.running:
-                # Handle input every frame (using proven pynput methods)
-                self.handle_input()
+                now = scheduler.clock()
+                
+                # Fixed-rate simulation: input and updates run once per due tick
+                for _ in range(scheduler.due_ticks(now)):
+                    self.tick()
                 
                 if self.game_state == GameState.MENU:
                     if not menu_shown:
                         self.draw_menu()
                         menu_shown = True
                         game_over_shown = False
+                        if self.first_frame_after is None:
+                            sys.stdout.flush()
+                            self.first_frame_after = time.perf_counter() - STARTUP_CLOCK
                         
                 elif self.game_state == GameState.PLAYING:
-                    # CRITICAL: Continuous gameplay - fire & brimstone falls every frame
-                    self.update_game()
-                    self.draw_game()
+                    if scheduler.render_due(now):
+                        self.draw_game(scheduler.alpha(now))
                     menu_shown = False
                     game_over_shown = False
                     
@@ -639,22 +2964,147 @@ class NeruppuDaaGame:
                         game_over_shown = True
                         menu_shown = False
                 
-                # Frame rate control
-                time.sleep(0.1)  # 10 FPS - smooth fire & brimstone animation
+                # Sleep until the next tick or frame is due
+                scheduler.wait(rendering=self.game_state == GameState.PLAYING)
                 
         except KeyboardInterrupt:
             pass
         finally:
             self.running = False
-            self.listener.stop()
+            self.renderer.close()
+            self.input.stop()
+            if self.audio is not None:
+                self.audio.close()
+            if self.recorder is not None:
+                self.save_replay()  # quit mid-game - keep what was played
             self.show_cursor()
             self.clear_screen()
             print(f"{Colors.YELLOW}Thanks for playing NERUPPU DAA! 🔥{Colors.RESET}")
 
+def parse_args(argv=None):
+    """Parse command-line options"""
+    import argparse
+    parser = argparse.ArgumentParser(description="NERUPPU DAA - Survive the Fire Stones")
+    parser.add_argument('--render', choices=['full', 'diff'], default='full',
+                        help="full: repaint the whole screen every frame, "
+                             "diff: only repaint cells that changed (default: full)")
+    parser.add_argument('--render-stats', action='store_true',
+                        help="print bytes written per frame on exit")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed the fire stone RNG for a reproducible run")
+    parser.add_argument('--fps', type=float, default=None,
+                        help=f"frames drawn per second; the game itself always ticks "
+                             f"{TICK_RATE} times a second (default: {TICK_RATE})")
+    parser.add_argument('--timing-stats', action='store_true',
+                        help="print tick deadline misses and lateness on exit")
+    parser.add_argument('--startup-stats', action='store_true',
+                        help="print time to first frame and to audio ready on exit")
+    parser.add_argument('--latency-stats', action='store_true',
+                        help="print input-to-frame latency percentiles on exit")
+    parser.add_argument('--audio-stats', action='store_true',
+                        help="print sounds played, merged and dropped, and music underruns and CPU share, on exit")
+    parser.add_argument('--no-music', action='store_true',
+                        help="sound effects only, no background music")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="time every frame phase and write a JSON report to PATH on exit")
+    parser.add_argument('--player', default=None,
+                        help="name stored with your scores (default: your login name)")
+    parser.add_argument('--leaderboard', metavar='PATH', default=default_leaderboard_path(),
+                        help="SQLite leaderboard shared by every game on this machine "
+                             "(default: %(default)s)")
+    parser.add_argument('--no-leaderboard', action='store_true',
+                        help="keep scores in memory only")
+    parser.add_argument('--cast', metavar='PATH',
+                        help="record the session as an asciicast v2 file (PATH.gz to compress)")
+    parser.add_argument('--arena', type=int, metavar='WIDTH',
+                        help="play in a world WIDTH columns wide that scrolls with the player")
+    parser.add_argument('--record', metavar='DIR',
+                        help="save a replay of every game to DIR")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="replay a recorded game headless and check its score")
+    parser.add_argument('--seek', type=int, metavar='FRAME',
+                        help="with --replay: jump to FRAME and print the state there")
+    parser.add_argument('--autopilot', type=float, nargs='?', const=AUTOPILOT_BUDGET * 1000, metavar='MS',
+                        help="attract mode: the computer plays, searching MS milliseconds "
+                             f"per tick (default: {AUTOPILOT_BUDGET * 1000:g})")
+    return parser.parse_args(argv)
+
+def replay_main(args):
+    """--replay: rebuild a recorded game without input, sound or rendering"""
+    replay = Replay(args.replay)
+    print(f"{Colors.CYAN}Replay: seed {replay.seed} | {replay.width}x{replay.height} | "
+          f"{replay.ticks:,} ticks | recorded score {replay.score:,}{Colors.RESET}")
+    
+    start = time.perf_counter()
+    engine = replay.play()
+    elapsed = time.perf_counter() - start
+    ok = engine.score == replay.score and engine.frame_count == replay.ticks
+    color = Colors.GREEN if ok else Colors.RED
+    print(f"{color}Replayed in {elapsed * 1000:.1f}ms ({replay.ticks / max(elapsed, 1e-9):,.0f} ticks/s) | "
+          f"score {engine.score:,} {'matches' if ok else 'DOES NOT MATCH'}{Colors.RESET}")
+    
+    if args.seek is not None:
+        start = time.perf_counter()
+        engine = replay.engine_at(args.seek)
+        elapsed = time.perf_counter() - start
+        print(f"Frame {engine.frame_count:,}: score {engine.score:,} | lives {engine.lives} | "
+              f"player x {engine.player_pos.x} | {len(engine.fire_brimstone)} fire stones | "
+              f"{len(engine.power_ups)} power-ups | seek took {elapsed * 1000:.1f}ms")
+    return 0 if ok else 1
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.arena and args.record:
+        sys.exit("--record does not support --arena yet")
+    if args.arena and args.autopilot:
+        sys.exit("--autopilot does not support --arena yet")
+    if args.replay:
+        sys.exit(replay_main(args))
+    
     print(f"{Colors.GREEN}✅ pynput keyboard test successful!{Colors.RESET}")
     print(f"{Colors.YELLOW}🎮 Starting NERUPPU DAA game with pynput{Colors.RESET}")
     print()
     
-    game = NeruppuDaaGame()
-    game.run()
\ No newline at end of file
+    leaderboard = None if args.no_leaderboard else Leaderboard(args.leaderboard)
+    if args.player is None:
+        import getpass
+        args.player = getpass.getuser()
+    game = NeruppuDaaGame(render_mode=args.render, seed=args.seed, fps=args.fps,
+                          record_dir=args.record, width=args.arena or 60,
+                          view_width=60 if args.arena else None,
+                          leaderboard=leaderboard, player=args.player, music=not args.no_music,
+                          autopilot=Autopilot(args.autopilot / 1000) if args.autopilot else None)
+    if args.profile:
+        game.enable_profiler()
+    if args.cast:
+        import shutil
+        columns, lines = shutil.get_terminal_size((100, 32))
+        cast = AsciicastRecorder(args.cast, columns, lines)
+        game.renderer.recorder = cast
+        sys.stdout = StdoutTee(sys.stdout, cast)
+    game.run()
+    if args.cast:
+        sys.stdout = sys.stdout.stream
+        cast.close()
+    if leaderboard is not None:
+        leaderboard.close()
+    
+    if args.profile:
+        game.profiler.write_report(args.profile)
+    
+    if args.render_stats:
+        print(game.renderer.stats_line())
+    if args.timing_stats:
+        print(game.scheduler.stats_line())
+    if args.startup_stats:
+        print(game.startup_stats_line())
+    if args.latency_stats:
+        print(game.latency_stats_line())
+    if args.audio_stats and game.audio is not None:
+        print(game.audio.stats_line())
+    if game.last_replay:
+        print(f"Last replay: {game.last_replay}")
+    if game.autopilot is not None:
+        print(game.autopilot.stats_line())
+    if args.cast:
+        print(cast.stats_line())
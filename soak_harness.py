@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+NERUPPU DAA - Soak harness
+Cycles start_game -> GAME_OVER -> reset_to_menu at full speed with
+scripted keys, and fails if memory or object counts keep growing
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmark import NullSink
+from neruppu_daa import (Colors, GameState, Leaderboard, NeruppuDaaGame, PygameAudio,
+                         TICK_RATE)
+
+# Slack per sampled series before a rise counts as growth
+SLACK = {'traced_bytes': 256 * 1024, 'gc_objects': 500}
+
+class ScriptedPlayer:
+    """Presses keys through a headless game's KeyInput, like a kiosk visitor
+
+    Space on the menu, R on the game-over screen and a random walk of held
+    A/D/arrow keys while playing.
+    """
+    MOVES = (None, 'a', 'd', 'left', 'right')
+
+    def __init__(self, game, seed):
+        self.game = game
+        self.rng = random.Random(seed)
+        self.held = None
+
+    def tap(self, key):
+        self.game.input.press(key)
+        self.game.input.release(key)
+
+    def tick(self):
+        state = self.game.game_state
+        if state == GameState.MENU:
+            self.tap('space')
+        elif state == GameState.GAME_OVER:
+            self.tap('r')
+        elif self.rng.random() < 0.2:
+            if self.held is not None:
+                self.game.input.release(self.held)
+            self.held = self.rng.choice(self.MOVES)
+            if self.held is not None:
+                self.game.input.press(self.held)
+
+class AllocationMeter:
+    """Traced bytes per call of one method: peak while it runs, and what it leaves
+
+    What update_game leaves behind is mostly the live game growing (new
+    stones), freed when the next game resets; the sampled series, not
+    this number, decide whether memory leaks.
+    """
+    def __init__(self, obj, name):
+        self.name = name
+        self.calls = 0
+        self.peak = 0
+        self.net = 0
+        self.blocks = 0
+        method = getattr(obj, name)
+        def metered(*args, **kwargs):
+            before, _ = tracemalloc.get_traced_memory()
+            blocks = sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                after, peak = tracemalloc.get_traced_memory()
+                self.calls += 1
+                self.peak += peak - before
+                self.net += after - before
+                self.blocks += sys.getallocatedblocks() - blocks
+        setattr(obj, name, metered)
+
+    def report(self):
+        calls = max(self.calls, 1)
+        return {'calls': self.calls, 'peak_bytes': self.peak / calls,
+                'retained_bytes': self.net / calls, 'retained_blocks': self.blocks / calls}
+
+def count_sounds():
+    """pygame Sound objects reachable from Python (they are not gc-tracked themselves)"""
+    if 'pygame' not in sys.modules:
+        return 0
+    sound_type = sys.modules['pygame'].mixer.Sound
+    found = set()
+    for obj in gc.get_objects():
+        for ref in gc.get_referents(obj):
+            if type(ref) is sound_type:
+                found.add(id(ref))
+    return len(found)
+
+def sample(game, frames, games):
+    """Retained memory and object counts, taken just after a game has started"""
+    gc.collect()
+    stores = (game.fire_brimstone, game.power_ups)
+    return {
+        'frame': frames,
+        'games': games,
+        'traced_bytes': tracemalloc.get_traced_memory()[0],
+        'entities': sum(len(store) for store in stores),
+        'entity_slots': sum(store.x.size for store in stores),
+        'index_entries': sum(len(bucket) for store in stores for bucket in store.index.buckets.values()),
+        'last_action_time': len(game.last_action_time),
+        'pending_presses': len(game.pending_presses),
+        'gc_objects': len(gc.get_objects()),
+        'sounds': count_sounds(),
+    }
+
+def growing(samples, name):
+    """True if every later sample is above every earlier one by more than the slack"""
+    values = [s[name] for s in samples]
+    half = len(values) // 2
+    if half < 2:
+        return False
+    return min(values[half:]) > max(values[:half]) + SLACK.get(name, 0)
+
+def soak(game, frames, interval, warmup, seed, console):
+    """Run the kiosk cycle, printing progress to console
+
+    Returns the samples, the first and last tracemalloc snapshots, the
+    allocation meters, the number of games and the seconds it took.
+    """
+    player = ScriptedPlayer(game, seed)
+    game.action_clock = lambda: ticks / TICK_RATE  # debounce on game time, not wall time
+    update = AllocationMeter(game, 'update_game')
+    draw = AllocationMeter(game, 'draw_game')
+
+    samples, baseline, latest = [], None, None
+    ticks = games = 0
+    shown = None
+    next_sample = warmup
+    start = time.perf_counter()
+    while ticks < frames:
+        state = game.game_state
+        player.tick()
+        game.tick()
+        ticks += 1
+
+        # Draw the way run() does: every playing tick, other screens once
+        if game.game_state == GameState.PLAYING:
+            game.draw_game()
+        elif game.game_state != shown:
+            if game.game_state == GameState.MENU:
+                game.draw_menu()
+            else:
+                game.draw_game_over()
+        shown = game.game_state
+
+        if state == GameState.MENU and game.game_state == GameState.PLAYING:
+            games += 1
+            if ticks >= next_sample:
+                samples.append(sample(game, ticks, games))
+                latest = tracemalloc.take_snapshot()
+                if baseline is None:
+                    baseline = latest
+                next_sample = ticks + interval
+                elapsed = time.perf_counter() - start
+                print(f"{ticks:>12,} frames | {games:>8,} games | {ticks / elapsed:>8,.0f} frames/s | "
+                      f"traced {samples[-1]['traced_bytes'] / 1024:>8,.0f} KiB | "
+                      f"gc objects {samples[-1]['gc_objects']:,}", file=console, flush=True)
+    return samples, baseline, latest, (update, draw), games, time.perf_counter() - start
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test NERUPPU DAA for memory growth")
+    parser.add_argument('--frames', type=int, default=2_000_000, help="ticks to run")
+    parser.add_argument('--interval', type=int, default=50_000, help="ticks between samples")
+    parser.add_argument('--warmup', type=int, default=50_000, help="ticks before the first sample")
+    parser.add_argument('--seed', type=int, default=0, help="seed for games and scripted keys")
+    parser.add_argument('--render', choices=['full', 'diff'], default='diff')
+    parser.add_argument('--audio', action='store_true',
+                        help="run the real sound and music threads on SDL's dummy audio driver")
+    parser.add_argument('--leaderboard', metavar='PATH', help="submit every run to this leaderboard")
+    parser.add_argument('--json', metavar='PATH', help="also write samples and results as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    leaderboard = Leaderboard(args.leaderboard) if args.leaderboard else None
+    game = NeruppuDaaGame(render_mode=args.render, headless=True, seed=args.seed, leaderboard=leaderboard)
+    game.renderer.out = NullSink()
+    if args.audio:
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        game.audio = PygameAudio(background=True)
+        game.audio.ready.wait()
+
+    tracemalloc.start()
+    console = sys.stdout
+    sys.stdout = NullSink()  # menus and game-over screens are print()ed
+    try:
+        samples, baseline, latest, meters, games, elapsed = soak(
+            game, args.frames, args.interval, args.warmup, args.seed, console)
+    finally:
+        sys.stdout = console
+    tracemalloc.stop()
+    if game.audio is not None:
+        game.audio.close()
+    if leaderboard is not None:
+        leaderboard.close()
+
+    print()
+    print(f"{Colors.CYAN}{args.frames:,} frames, {games:,} games in {elapsed:.0f}s "
+          f"({args.frames / elapsed:,.0f} frames/s with tracemalloc on){Colors.RESET}")
+    for meter in meters:
+        r = meter.report()
+        print(f"{meter.name:<12} {r['peak_bytes']:>10,.0f} B peak | {r['retained_bytes']:>+8.1f} B and "
+              f"{r['retained_blocks']:>+6.2f} blocks left after the call | per frame, {r['calls']:,} calls")
+
+    failures = []
+    if len(samples) < 4:
+        print(f"{Colors.YELLOW}Only {len(samples)} samples - run more frames to judge growth{Colors.RESET}")
+    else:
+        for name in ('traced_bytes', 'gc_objects', 'entities', 'entity_slots', 'index_entries',
+                     'last_action_time', 'pending_presses', 'sounds'):
+            values = [s[name] for s in samples]
+            grew = growing(samples, name)
+            color = Colors.RED if grew else Colors.GREEN
+            print(f"{color}{name:<18} {values[0]:>12,} -> {values[-1]:>12,}  "
+                  f"{'GROWING' if grew else 'steady'}{Colors.RESET}")
+            if grew:
+                failures.append(name)
+        if 'traced_bytes' in failures:
+            print(f"{Colors.YELLOW}Largest increases since the first sample:{Colors.RESET}")
+            for stat in latest.compare_to(baseline, 'lineno')[:10]:
+                print(f"  {stat}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'samples': samples, 'failures': failures,
+                       'allocations': {m.name: m.report() for m in meters}}, f, indent=2)
+    if failures:
+        print(f"{Colors.RED}Growth in: {', '.join(failures)}{Colors.RESET}")
+        return 1
+    print(f"{Colors.GREEN}No growth{Colors.RESET}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
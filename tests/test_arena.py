@@ -0,0 +1,35 @@
+"""Scrolling arenas whose width leaves a chunk with no spawn columns"""
+
+import pytest
+
+from neruppu_daa import ARENA_CHUNK_WIDTH, GameState, NeruppuDaaEngine, INPUT_RIGHT
+
+
+@pytest.mark.parametrize('width', [ARENA_CHUNK_WIDTH + 1, 2 * ARENA_CHUNK_WIDTH + 1, 1025])
+def test_width_one_past_a_chunk_boundary(width):
+    engine = NeruppuDaaEngine(width=width, view_width=60, seed=1)
+    engine.start_game(1)
+    engine.lives = 1 << 30  # only the spawning is under test
+    # Walk to the right edge so the last chunk comes into range
+    for _ in range(width // 2 + 20):
+        engine.step(INPUT_RIGHT)
+    assert engine.game_state == GameState.PLAYING
+    assert engine.player_pos.x >= width - 3
+
+
+def test_every_chunk_has_spawn_columns():
+    for width in range(62, 3 * ARENA_CHUNK_WIDTH + 3):
+        engine = NeruppuDaaEngine(width=width, view_width=60)
+        arena = engine.arena
+        for index in range(arena.chunks):
+            first, last = arena.columns(index)
+            assert first <= last, (width, index)
+        assert arena.columns(arena.chunks - 1)[1] == width - 2
+
+
+def test_history_outlasts_slowest_power_up():
+    # A regenerated chunk only replays the last `history` frames; a power-up
+    # spawned before that must already have fallen off, even in slow motion
+    for height in (10, 20, 47):
+        arena = NeruppuDaaEngine(width=300, height=height, view_width=60).arena
+        assert (arena.history - 1) * 0.6 * 0.5 >= height
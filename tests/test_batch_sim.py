@@ -0,0 +1,39 @@
+"""BatchedEngine must play every seed exactly like the scalar engine"""
+
+import numpy as np
+import pytest
+
+from balance_analyzer import dodge_policy
+from batch_sim import BatchedEngine
+from neruppu_daa import GameState, NeruppuDaaEngine
+
+SEEDS = range(100, 250)
+MAX_FRAMES = 3000
+RNG = np.random.default_rng(7)
+
+
+def random_policy(engine):
+    return RNG.integers(0, 4, size=engine.live)
+
+
+@pytest.mark.parametrize('policy', [dodge_policy, random_policy])
+def test_batched_games_match_scalar_engine(policy):
+    actions = {seed: [] for seed in SEEDS}
+
+    def recording(engine):
+        chosen = policy(engine)
+        for game, action in zip(engine.ids.tolist(), np.asarray(chosen).tolist()):
+            actions[SEEDS[game]].append(action)
+        return chosen
+
+    batch = BatchedEngine(SEEDS).run(recording, max_frames=MAX_FRAMES)
+
+    for i, seed in enumerate(SEEDS):
+        engine = NeruppuDaaEngine()
+        engine.start_game(seed)
+        for action in actions[seed]:
+            if engine.game_state != GameState.PLAYING:
+                break
+            engine.step(action)
+        assert (engine.frame_count, engine.score) == (batch.frames[i], batch.scores[i]), seed
+        assert (engine.game_state == GameState.GAME_OVER) == batch.game_over[i], seed
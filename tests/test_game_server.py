@@ -0,0 +1,90 @@
+"""Key decoding and a server driven by loopback players and a spectator"""
+
+import asyncio
+
+from game_server import DO, IAC, SB, SE, GameServer, KeyDecoder, TELNET_HELLO, loopback_bench
+from neruppu_daa import GameState, TICK_RATE
+
+
+def test_keys_and_telnet_negotiation():
+    keys = KeyDecoder()
+    negotiation = bytes((IAC, DO, 1, IAC, SB, 24, 0, ord('x'), IAC, SE))
+    assert keys.feed(negotiation + b'aD q\033[D\033OC') == ['a', 'd', 'space', 'q', 'left', 'right']
+    assert keys.pending == b''
+
+
+def test_escape_sequences_split_across_reads():
+    keys = KeyDecoder()
+    assert keys.feed(b'\033') == []
+    assert keys.feed(b'[') == []
+    assert keys.feed(b'D') == ['left']
+    # Modified arrows still move; other sequences are skipped whole
+    assert keys.feed(b'\033[1;5C\033[A\033[B\033[3~') == ['right']
+    assert keys.pending == b''
+
+
+def test_lone_escape_does_not_hold_back_the_next_key():
+    keys = KeyDecoder()
+    assert keys.feed(b'\033') == []
+    assert keys.feed(b'd') == ['d']
+    assert keys.feed(b'\033\033a') == ['a']
+
+
+async def play(server):
+    """Two players start games and steer; a spectator watches the featured one"""
+    port, spectator_port = await server.serve('127.0.0.1', 0, 0)
+    players = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+    await asyncio.sleep(3 / TICK_RATE)
+    assert len(server.sessions) == 2
+
+    for _, writer in players:
+        writer.write(b' ')
+    await asyncio.sleep(3 / TICK_RATE)
+    assert all(session.game.game_state == GameState.PLAYING for session in server.sessions)
+
+    spectator = await asyncio.open_connection('127.0.0.1', spectator_port)
+    for session in server.sessions:
+        session.game.lives = 50  # only the input is under test
+    start = [session.game.player_pos.x for session in server.sessions]
+    # Arrow keys split mid-sequence, one press per tick
+    for _ in range(4):
+        players[0][1].write(b'\033[')
+        players[1][1].write(b'd\033')
+        await asyncio.sleep(0.5 / TICK_RATE)
+        players[0][1].write(b'D')
+        players[1][1].write(b'OC')
+        await asyncio.sleep(1 / TICK_RATE)
+    await asyncio.sleep(2 / TICK_RATE)
+    moved = [session.game.player_pos.x - x for session, x in zip(server.sessions, start)]
+
+    received = []
+    for reader, _ in players + [spectator]:
+        received.append(await asyncio.wait_for(reader.read(1 << 20), 1.0))
+    for _, writer in players + [spectator]:
+        writer.write(b'q')
+    await asyncio.sleep(3 / TICK_RATE)
+    for _, writer in players + [spectator]:
+        writer.close()
+    sessions_left = len(server.sessions)
+    await server.close()
+    return moved, received, sessions_left
+
+
+def test_players_and_spectator_over_loopback():
+    server = GameServer(seed=5)
+    moved, received, sessions_left = asyncio.run(play(server))
+    assert moved[0] < 0 < moved[1]
+    for data in received:
+        assert data.startswith(TELNET_HELLO)
+        assert b'Score: ' in data  # game frames, the spectator's from the featured game
+    assert sessions_left == 0
+    assert server.totals()[4] > 0  # frames
+
+
+def test_loopback_bench():
+    server = GameServer(seed=9)
+    received = asyncio.run(loopback_bench(server, 3, 1.5, 9, spectators=1))
+    assert received > 0
+    ticks, _, bytes_in, bytes_out, frames, _ = server.totals()
+    assert ticks and bytes_in and frames
+    assert server.peak_sessions == 3
@@ -0,0 +1,44 @@
+"""Replays rebuild the recorded game, and seeking matches a full re-run"""
+
+from neruppu_daa import (Autopilot, GameState, NeruppuDaaEngine, Replay, ReplayRecorder,
+                         SNAPSHOT_EVERY)
+
+SEED = 1234
+TICKS = 2 * SNAPSHOT_EVERY + 300
+
+
+def record(path):
+    """Play a game past two snapshots with the autopilot and save it"""
+    engine = NeruppuDaaEngine()
+    engine.start_game(SEED)
+    recorder = ReplayRecorder(engine, SEED)
+    autopilot = Autopilot(budget=0.002)
+    while engine.game_state == GameState.PLAYING and engine.frame_count < TICKS:
+        action = autopilot.choose(engine)
+        engine.move_player(action)
+        engine.update_game()
+        recorder.record(action)
+    recorder.write(path)
+    return engine
+
+
+def test_replay_and_seek(tmp_path):
+    path = str(tmp_path / 'game.ndr')
+    played = record(path)
+    replay = Replay(path)
+    assert replay.ticks == played.frame_count > SNAPSHOT_EVERY
+    assert replay.snapshot_frames
+
+    engine = replay.play()
+    assert engine.score == replay.score == played.score
+    assert engine.frame_count == replay.ticks
+
+    for frame in (SNAPSHOT_EVERY - 1, SNAPSHOT_EVERY, SNAPSHOT_EVERY + 234, replay.ticks):
+        if frame > replay.ticks:
+            continue
+        stepped = NeruppuDaaEngine()
+        stepped.start_game(SEED)
+        for inputs in replay.inputs[:frame]:
+            stepped.move_player(inputs)
+            stepped.update_game()
+        assert replay.engine_at(frame).snapshot() == stepped.snapshot(), frame
@@ -0,0 +1,106 @@
+"""Diff-mode output must leave the terminal showing what a full repaint would"""
+
+import io
+import re
+
+import numpy as np
+import pytest
+
+from neruppu_daa import (ACTION_LEFT, ACTION_RIGHT, ACTION_STAY, GameState, NeruppuDaaGame,
+                        TerminalRenderer)
+
+FRAMES = 400
+ESCAPE = re.compile(r'\033\[([0-9;]*)([A-Za-z])')
+
+
+class Screen:
+    """Just enough of a terminal for the renderer: CUP, ED, EL, SGR and newlines
+
+    Cells map (row, column) to (glyph, attributes); blank cells are left
+    out, so a space drawn in any colour looks like one never drawn.
+    """
+    def __init__(self):
+        self.cells = {}
+        self.row = self.col = 0
+        self.bold = False
+        self.color = None
+
+    def feed(self, data):
+        text = data.decode()
+        i = 0
+        while i < len(text):
+            match = ESCAPE.match(text, i)
+            if match:
+                self.escape(match.group(1), match.group(2))
+                i = match.end()
+                continue
+            char = text[i]
+            if char == '\n':
+                self.row += 1
+                self.col = 0
+            else:
+                if char == ' ':
+                    self.cells.pop((self.row, self.col), None)
+                else:
+                    self.cells[self.row, self.col] = (char, self.bold, self.color)
+                self.col += 1
+            i += 1
+
+    def escape(self, params, command):
+        if command == 'H':
+            row, _, col = params.partition(';')
+            self.row = int(row or 1) - 1
+            self.col = int(col or 1) - 1
+        elif command == 'J':
+            self.cells.clear()
+        elif command == 'K':
+            for cell in [cell for cell in self.cells if cell[0] == self.row and cell[1] >= self.col]:
+                del self.cells[cell]
+        elif command == 'm':
+            for code in (params or '0').split(';'):
+                if code == '0':
+                    self.bold, self.color = False, None
+                elif code == '1':
+                    self.bold = True
+                else:
+                    self.color = code
+        else:
+            raise AssertionError(f"unexpected escape {command!r}")
+
+
+def frames(seed):
+    """(rows, styles) of a seeded game, the shield flipped every few frames
+
+    Each flip also re-sends the unchanged field with the other style table,
+    so some frames differ from the last only in the colour of the '@'.
+    """
+    rng = np.random.default_rng(seed)
+    game = NeruppuDaaGame(headless=True, seed=seed)
+    game.start_game(seed)
+    game.lives = 30
+    for frame in range(FRAMES):
+        if game.game_state != GameState.PLAYING:
+            break
+        game.move_player(int(rng.choice([ACTION_STAY, ACTION_LEFT, ACTION_RIGHT])))
+        game.update_game()
+        yield game.frame_rows(0.5)
+        yield game.frame_rows()
+        if frame % 7 == 0:
+            game.shield_active = not game.shield_active
+            yield game.frame_rows()
+
+
+@pytest.mark.parametrize('seed', [3, 11, 2024])
+def test_diff_frames_match_full_repaints(seed):
+    full = TerminalRenderer(diff=False, out=io.BytesIO())
+    diff = TerminalRenderer(diff=True, out=io.BytesIO())
+    full_screen, diff_screen = Screen(), Screen()
+    restyled = 0
+    for n, (rows, styles) in enumerate(frames(seed)):
+        if diff.prev_rows is not None and rows[4:-2] == diff.prev_rows[4:-2] and styles is not diff.prev_styles:
+            restyled += 1
+        full_screen.feed(full.compose(rows, styles))
+        diff_screen.feed(diff.compose(rows, styles))
+        assert diff_screen.cells == full_screen.cells, n
+        assert (diff_screen.row, diff_screen.col) == (full_screen.row, full_screen.col), n
+    assert restyled